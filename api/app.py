@@ -1,16 +1,57 @@
+import asyncio
+import concurrent.futures
+import json
 import os
-from typing import Optional
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import (AsyncIterator, Callable, Dict, Iterator, List, Optional,
+                    Tuple)
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import (JSONResponse, PlainTextResponse,
+                               StreamingResponse)
 from pydantic import BaseModel
 import uvicorn
 
+from src.correctors.backends import DEFAULT_BACKEND
+from src.correctors.error_model import ErrorModel
+from src.correctors.feedback import FeedbackStore
 from src.correctors.pn_corrector import PeterNorvigCorrector
 from src.dataset.language_detector import SimpleLanguageDetector
+from src.metrics import metrics
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Open the feedback store and follow the corrections other workers
+    write to it, and start loading the correctors of all languages in the
+    background when the server starts, unless SPELLING_PRELOAD is 0.
+    Save the cache snapshots of the correctors when it stops.
+    """
+    global feedback_store
+    tasks = []
+    if FEEDBACK_DB:
+        feedback_store = FeedbackStore(FEEDBACK_DB)
+        tasks.append(asyncio.ensure_future(follow_feedback()))
+    if PRELOAD:
+        tasks += [asyncio.ensure_future(run_in_executor(load_language, lang))
+                  for lang in SUPPORTED_LANGUAGES]
+    yield
+    for task in tasks:
+        task.cancel()
+    if SNAPSHOT_DIR:
+        for lang, corrector in list(correctors.items()):
+            corrector.save_snapshot(snapshot_path(lang))
+    if feedback_store is not None:
+        feedback_store.close()
+        feedback_store = None
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,6 +61,24 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Count every request and record its latency by endpoint. Requests are
+    labelled with the path of the route they matched, or "other", so that
+    arbitrary URLs do not add metrics without end.
+    """
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else "other"
+    metrics.observe("spelling_request_seconds", time.perf_counter() - start,
+                    path=path)
+    metrics.increment("spelling_requests_total", path=path,
+                      status=str(response.status_code))
+    return response
+
+
 detector = SimpleLanguageDetector()
 
 SUPPORTED_LANGUAGES = {
@@ -27,7 +86,60 @@ SUPPORTED_LANGUAGES = {
     "bg": os.path.join("src", "dataset", "bg.txt")
 }
 
+# Candidate search index used by every corrector of the API.
+BACKEND = os.environ.get("SPELLING_BACKEND", DEFAULT_BACKEND)
+
+# Whether suggestions are ranked by a model of typing errors on the
+# keyboard of each language, as the words come from the web UI;
+# SPELLING_TYPING_MODEL=0 ranks the nearest words by probability only.
+TYPING_MODEL = os.environ.get("SPELLING_TYPING_MODEL", "1") != "0"
+
+# Correction runs in these threads, so that a slow search does not block
+# the event loop. SPELLING_WORKERS sets their number.
+executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.environ["SPELLING_WORKERS"])
+    if "SPELLING_WORKERS" in os.environ else None,
+    thread_name_prefix="corrector",
+)
+
+# Seconds a request waits for its suggestions before it gets the best
+# ones known so far. The search goes on and caches its result.
+TIME_BUDGET = float(os.environ.get("SPELLING_TIME_BUDGET", "2.0"))
+
+# Whether all correctors are loaded at startup.
+PRELOAD = os.environ.get("SPELLING_PRELOAD", "1") != "0"
+
+# Text file of typical queries, e.g. the misspellings most often sent to
+# the API, one per line. The suggestions for those of every language are
+# cached as soon as it is loaded, so that they never wait for a search.
+WARMUP_FILE = os.environ.get("SPELLING_WARMUP_FILE")
+
+# SQLite database keeping the corrections confirmed through /update, shared
+# by all workers of the API; SPELLING_FEEDBACK_DB= disables it. Every
+# worker checks it for new corrections every SPELLING_FEEDBACK_POLL seconds.
+FEEDBACK_DB = os.environ.get("SPELLING_FEEDBACK_DB",
+                             os.path.join("src", "dataset", "feedback.db"))
+FEEDBACK_POLL = float(os.environ.get("SPELLING_FEEDBACK_POLL", "1.0"))
+feedback_store: Optional[FeedbackStore] = None
+
+# Directory keeping a cache snapshot per language, loaded by the correctors
+# before their first correction and saved when the server stops.
+SNAPSHOT_DIR = os.environ.get("SPELLING_SNAPSHOT_DIR")
+
 correctors = {}
+# Every language has its own lock, so that languages load in parallel
+# but each is only loaded once.
+_corrector_locks: Dict[str, threading.Lock] = {}
+_corrector_locks_lock = threading.Lock()
+
+# Loading state of every language: loading, warming, ready or failed.
+language_status: Dict[str, str] = {}
+
+# Searches in progress, by language and lowercase word.
+_pending: Dict[Tuple[str, str], asyncio.Future] = {}
+# Best suggestions found so far by the searches in progress, which widen
+# one distance at a time.
+_partial: Dict[Tuple[str, str], List[str]] = {}
 
 
 def get_corrector_for_lang(lang: str) -> Optional[PeterNorvigCorrector]:
@@ -36,12 +148,142 @@ def get_corrector_for_lang(lang: str) -> Optional[PeterNorvigCorrector]:
     """
     if lang not in SUPPORTED_LANGUAGES:
         return None
-    if lang not in correctors:
-        dataset_path = SUPPORTED_LANGUAGES[lang]
-        correctors[lang] = PeterNorvigCorrector(dataset_path, max_distance=3)
+    with _corrector_locks_lock:
+        lock = _corrector_locks.setdefault(lang, threading.Lock())
+    with lock:
+        if lang not in correctors:
+            dataset_path = SUPPORTED_LANGUAGES[lang]
+            correctors[lang] = PeterNorvigCorrector(
+                dataset_path, max_distance=3, backend=BACKEND,
+                snapshot_path=snapshot_path(lang) if SNAPSHOT_DIR else None,
+                error_model=ErrorModel.for_language(lang)
+                if TYPING_MODEL else None
+            )
+            if feedback_store is not None:
+                for _, _, word, correction in \
+                        feedback_store.read_since(0, lang):
+                    correctors[lang].update_cache(word, correction)
+            language_status.setdefault(lang, "ready")
     return correctors[lang]
 
 
+def snapshot_path(lang: str) -> str:
+    """
+    Return the path of the cache snapshot of a language.
+    """
+    return os.path.join(SNAPSHOT_DIR, f"{lang}.cache")
+
+
+def warmup_words(lang: str) -> List[str]:
+    """
+    Return the words of WARMUP_FILE detected as the given language.
+    """
+    if not WARMUP_FILE:
+        return []
+    with open(WARMUP_FILE, encoding="utf8") as file:
+        words = [line.strip() for line in file]
+    return [word for word in words
+            if word and detector.detect(word) == lang]
+
+
+def load_language(lang: str) -> None:
+    """
+    Load the corrector of a language and cache the suggestions for its
+    words of WARMUP_FILE, keeping language_status up to date.
+    """
+    language_status[lang] = "loading"
+    try:
+        corrector = get_corrector_for_lang(lang)
+        language_status[lang] = "warming"
+        for word in warmup_words(lang):
+            corrector.candidates(word, 5)
+    except Exception:
+        language_status[lang] = "failed"
+        raise
+    language_status[lang] = "ready"
+
+
+async def follow_feedback() -> None:
+    """
+    Apply the corrections written to the feedback store by any worker to
+    the loaded correctors. Correctors loaded later replay the whole store.
+    """
+    last_id = await run_in_executor(feedback_store.last_id)
+    while True:
+        await asyncio.sleep(FEEDBACK_POLL)
+        entries = await run_in_executor(feedback_store.read_since, last_id)
+        for last_id, lang, word, correction in entries:
+            corrector = correctors.get(lang)
+            if corrector is not None:
+                corrector.update_cache(word, correction)
+
+
+def suggest(lang: str, word: str) -> List[str]:
+    """
+    Return up to 5 spelling suggestions for a word of the given language,
+    keeping the best ones found so far in _partial while searching.
+    """
+    key = (lang, word.lower())
+
+    def publish(suggestions: List[str]) -> None:
+        _partial[key] = suggestions
+
+    try:
+        return get_corrector_for_lang(lang).candidates(word, 5,
+                                                       progress=publish)
+    finally:
+        _partial.pop(key, None)
+
+
+def best_known_suggestions(lang: str, word: str) -> List[str]:
+    """
+    Return the suggestions for a word that are available without searching:
+    the cached ones, else the nearest found so far by a search in progress.
+    """
+    corrector = correctors.get(lang)
+    if corrector is not None:
+        cached = corrector.cached_candidates(word)
+        if cached is not None:
+            return cached[:5]
+    return _partial.get((lang, word.lower()), [word])
+
+
+async def run_in_executor(function: Callable, *args) -> object:
+    """
+    Run a blocking function in the correction threads.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, function, *args)
+
+
+async def budgeted_suggestions(lang: str,
+                               word: str) -> Tuple[List[str], bool]:
+    """
+    Return the suggestions for a word and whether they are partial.
+    Identical concurrent requests share a single search. If it takes
+    longer than TIME_BUDGET, the best suggestions known so far, e.g. the
+    nearest words found before the search widened, are returned as
+    partial.
+    """
+    key = (lang, word.lower())
+    loop = asyncio.get_running_loop()
+    future = _pending.get(key)
+    if future is None or future.get_loop() is not loop:
+        future = loop.run_in_executor(executor, suggest, lang, word)
+        _pending[key] = future
+
+        def forget(done: asyncio.Future) -> None:
+            if _pending.get(key) is done:
+                del _pending[key]
+
+        future.add_done_callback(forget)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future),
+                                      TIME_BUDGET), False
+    except asyncio.TimeoutError:
+        return best_known_suggestions(lang, word), True
+
+
 @app.get("/correct")
 async def correct_word(
     word: str = Query(..., description="The word to check")
@@ -50,6 +292,8 @@ async def correct_word(
     API Endpoint: Returns spelling suggestions for a given word.
     Query parameters:
       - word: the word to check.
+    If the search takes longer than the time budget, the best suggestions
+    known so far are returned and partial is true.
     """
     word = word.strip()
     if not word:
@@ -59,10 +303,139 @@ async def correct_word(
         raise HTTPException(
             status_code=400, detail="Language not recognized"
         )
-    corrector = get_corrector_for_lang(lang)
-    suggestions = corrector.candidates(word)[:5]
+    suggestions, partial = await budgeted_suggestions(lang, word)
     print(f"Word: {word}, Language: {lang}, Suggestions: {suggestions}")
-    return {"word": word, "suggestions": suggestions}
+    return {"word": word, "suggestions": suggestions, "partial": partial}
+
+
+class BatchRequest(BaseModel):
+    words: Optional[List[str]] = None
+    text: Optional[str] = None
+
+
+def batch_suggestions(tokens: List[str]) -> Iterator[dict]:
+    """
+    Yield the language and the suggestions of every token, in order, each
+    as soon as it is corrected. Every distinct token is detected and
+    corrected once, and the corrector of every language is looked up once
+    per request.
+    """
+    languages: Dict[str, Optional[str]] = {}
+    suggestions: Dict[str, List[str]] = {}
+    language_correctors: Dict[str, PeterNorvigCorrector] = {}
+    for token in tokens:
+        if token not in languages:
+            lang = detector.detect(token)
+            lang = lang if lang in SUPPORTED_LANGUAGES else None
+            languages[token] = lang
+            if lang is not None:
+                if lang not in language_correctors:
+                    language_correctors[lang] = get_corrector_for_lang(lang)
+                suggestions[token] = \
+                    language_correctors[lang].candidates(token, 5)
+        yield {"word": token,
+               "language": languages[token],
+               "suggestions": suggestions.get(token, [])}
+
+
+@app.post("/correct/batch")
+async def correct_batch(
+    data: BatchRequest,
+    accept: str = Header(default="application/json")
+):
+    """
+    API Endpoint: Returns spelling suggestions for many words at once.
+    Expects a JSON body with either:
+      - words: the list of words to check.
+      - text: a text whose words are checked.
+    Every word is reported with its language (null if not recognized)
+    and up to 5 suggestions. Clients accepting application/x-ndjson get
+    one JSON object per line, streamed as the words are corrected.
+    """
+    if data.words is not None:
+        tokens = [word.strip() for word in data.words if word.strip()]
+    elif data.text is not None:
+        tokens = re.findall(r'\w+', data.text)
+    else:
+        raise HTTPException(status_code=400, detail="No words provided")
+    results = batch_suggestions(tokens)
+    if "application/x-ndjson" in accept:
+        return StreamingResponse(
+            (json.dumps(result, ensure_ascii=False) + "\n"
+             for result in results),
+            media_type="application/x-ndjson"
+        )
+    return {"results": await run_in_executor(list, results)}
+
+
+@app.get("/complete")
+async def complete_prefix(
+    prefix: str = Query(..., description="The beginning of a word")
+) -> dict:
+    """
+    API Endpoint: Returns the most probable words starting with a prefix.
+    Query parameters:
+      - prefix: the beginning of the word being typed.
+    """
+    prefix = prefix.strip()
+    if not prefix:
+        raise HTTPException(status_code=400, detail="No prefix provided")
+    lang = detector.detect(prefix)
+    if lang is None or lang not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=400, detail="Language not recognized"
+        )
+    corrector = await run_in_executor(get_corrector_for_lang, lang)
+    completions = await run_in_executor(corrector.completions, prefix)
+    return {"prefix": prefix, "completions": completions}
+
+
+@app.get("/segment")
+async def segment_text(
+    text: str = Query(..., description="Words written without spaces")
+) -> dict:
+    """
+    API Endpoint: Splits run-together words, like "thisisasentence",
+    into the most probable sequence of corrected words.
+    Query parameters:
+      - text: the words written without spaces.
+    """
+    text = text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="No text provided")
+    lang = detector.detect(text)
+    if lang is None or lang not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=400, detail="Language not recognized"
+        )
+    corrector = await run_in_executor(get_corrector_for_lang, lang)
+    words = await run_in_executor(corrector.segment, text)
+    return {"text": text, "words": words}
+
+
+@app.get("/ready")
+async def readiness() -> JSONResponse:
+    """
+    API Endpoint: Reports the loading state of every language.
+    Responds with status 503 until all languages are ready.
+    """
+    languages = {lang: language_status.get(lang, "not loaded")
+                 for lang in SUPPORTED_LANGUAGES}
+    ready = all(status == "ready" for status in languages.values())
+    return JSONResponse(status_code=200 if ready else 503,
+                        content={"ready": ready, "languages": languages})
+
+
+@app.get("/metrics")
+async def metrics_endpoint() -> PlainTextResponse:
+    """
+    API Endpoint: Returns the request, stage latency, cache and dictionary
+    metrics in the Prometheus text format.
+    """
+    for lang, corrector in list(correctors.items()):
+        corrector.export_metrics(language=lang)
+    return PlainTextResponse(metrics.render_prometheus(),
+                             media_type="text/plain; version=0.0.4")
 
 
 class UpdateRequest(BaseModel):
@@ -74,7 +447,7 @@ class UpdateRequest(BaseModel):
 async def update_correction(data: UpdateRequest) -> dict:
     """
     API Endpoint: Updates the cache with the correction confirmed by the
-    user.
+    user and records it in the feedback store.
     Expects a JSON body with:
       - word: the word typed by the user.
       - correction: the user-chosen correction.
@@ -90,8 +463,10 @@ async def update_correction(data: UpdateRequest) -> dict:
         raise HTTPException(
             status_code=400, detail="Language not recognized"
         )
-    corrector = get_corrector_for_lang(lang)
+    corrector = await run_in_executor(get_corrector_for_lang, lang)
     corrector.update_cache(word, correction)
+    if feedback_store is not None:
+        feedback_store.add(lang, word, correction)
     return {"message": "Cache updated."}
 
 
@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+from src.app import correct_text, process_file
+from src.correctors import backends
+from src.correctors.pn_corrector import PeterNorvigCorrector
+from src.dataset.languages import alphabets
+
+# Metrics for which a higher value is better; lower is better for the rest.
+HIGHER_IS_BETTER = {"words_per_second"}
+
+
+def misspell(word: str, edits: int, alphabet: str, rng: random.Random) -> str:
+    """
+    Apply edits random deletions, insertions, substitutions and
+    transpositions to a word.
+    """
+    for _ in range(edits):
+        operation = rng.choice("disx" if len(word) > 1 else "is")
+        i = rng.randrange(len(word))
+        if operation == "d":
+            word = word[:i] + word[i + 1:]
+        elif operation == "i":
+            word = word[:i] + rng.choice(alphabet) + word[i:]
+        elif operation == "s":
+            word = word[:i] + rng.choice(alphabet) + word[i + 1:]
+        else:
+            i = min(i, len(word) - 2)
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word
+
+
+def make_workload(corrector: PeterNorvigCorrector,
+                  language: str,
+                  size: int,
+                  max_edits: int,
+                  seed: int) -> List[str]:
+    """
+    Return size words drawn by frequency from the dictionary of the
+    corrector, about half of them misspelled by 1 to max_edits edits.
+    """
+    rng = random.Random(seed)
+    words = sorted(w for w in corrector.words_dict if len(w) >= 3)
+    weights = [corrector.words_dict[w] for w in words]
+    workload = []
+    for word in rng.choices(words, weights=weights, k=size):
+        if rng.random() < 0.5:
+            word = misspell(word, rng.randint(1, max_edits),
+                            alphabets[language], rng)
+        workload.append(word)
+    return workload
+
+
+def time_each(function: Callable[[str], object],
+              inputs: List[str]) -> Dict[str, float]:
+    """
+    Call function on every input and return the p50 and p99 latencies
+    and the number of inputs processed per second.
+    """
+    latencies = []
+    for value in inputs:
+        start = time.perf_counter()
+        function(value)
+        latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "words_per_second": len(inputs) / total if total else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    """
+    Return the peak resident set size of the process in megabytes.
+    """
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_benchmarks(dataset_path: str,
+                   language: str,
+                   backend: str,
+                   max_distance: int,
+                   size: int,
+                   seed: int) -> Dict[str, Dict[str, float]]:
+    """
+    Run every benchmark on one dataset and return its results by name.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+
+    backends._shared_indexes.clear()
+    start = time.perf_counter()
+    corrector = PeterNorvigCorrector(dataset_path, max_distance,
+                                     backend=backend)
+    results["construction"] = {"seconds": time.perf_counter() - start}
+    workload = make_workload(corrector, language, size, max_distance, seed)
+
+    for distance in range(1, max_distance + 1):
+        # A fresh corrector per distance, so that no cache is warm.
+        corrector = PeterNorvigCorrector(dataset_path, distance,
+                                         backend=backend)
+        results[f"correct_d{distance}"] = time_each(corrector.correct,
+                                                    workload)
+        corrector = PeterNorvigCorrector(dataset_path, distance,
+                                         backend=backend)
+        results[f"candidates_d{distance}"] = time_each(corrector.candidates,
+                                                       workload)
+
+    lines = [" ".join(workload[i:i + 10]) + "."
+             for i in range(0, len(workload), 10)]
+    corrector = PeterNorvigCorrector(dataset_path, max_distance,
+                                     backend=backend)
+    text_result = time_each(lambda line: correct_text(line, corrector), lines)
+    text_result["words_per_second"] *= len(workload) / len(lines)
+    results["process_text"] = text_result
+
+    corrector = PeterNorvigCorrector(dataset_path, max_distance,
+                                     backend=backend)
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "input.txt")
+        with open(input_path, "w", encoding="utf8") as file:
+            file.write("\n".join(lines))
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), \
+                contextlib.redirect_stderr(io.StringIO()):
+            asyncio.run(process_file(input_path, corrector, language,
+                                     output_dir=directory))
+        seconds = time.perf_counter() - start
+    results["process_file"] = {"seconds": seconds,
+                               "words_per_second": len(workload) / seconds}
+    results["memory"] = {"peak_rss_mb": peak_rss_mb()}
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[Tuple[str, str, float, float]]:
+    """
+    Return the (benchmark, metric, baseline, result) of every metric that
+    is worse than the baseline by more than tolerance (a fraction).
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            if not old:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                worse = value < old * (1 - tolerance)
+            else:
+                worse = value > old * (1 + tolerance)
+            if worse:
+                regressions.append((name, metric, old, value))
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    """
+    Print the results as a table.
+    """
+    print(f"{'Benchmark':<18}{'Metric':<20}{'Value':>14}")
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            print(f"{name:<18}{metric:<20}{value:>14.4f}")
+
+
+def main() -> None:
+    """
+    Benchmark the corrector on a synthetic misspelling workload and
+    optionally compare the results with a saved baseline.
+    """
+    parser = argparse.ArgumentParser(description="Corrector benchmarks.")
+    parser.add_argument("-l", "--language", choices=list(alphabets),
+                        default="en",
+                        help="Language of the dataset (default: en).")
+    parser.add_argument("--dataset", type=str,
+                        help="Dataset path (default: src/dataset/<lang>.txt)")
+    parser.add_argument("-b", "--backend", choices=list(backends.BACKENDS),
+                        default=backends.DEFAULT_BACKEND,
+                        help="Candidate search index.")
+    parser.add_argument("-d", "--max-edit-distance", type=int, default=2,
+                        help="Largest distance benchmarked (default: 2).")
+    parser.add_argument("-s", "--size", type=int, default=1000,
+                        help="Number of words in the workload.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the workload generator.")
+    parser.add_argument("--baseline", type=str,
+                        help="Baseline JSON file to compare the results with.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline.")
+    parser.add_argument("--save", type=str,
+                        help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    dataset_path = args.dataset or f"src/dataset/{args.language}.txt"
+    results = run_benchmarks(dataset_path, args.language, args.backend,
+                             args.max_edit_distance, args.size, args.seed)
+    print_results(results)
+
+    if args.save:
+        report = {
+            "meta": {
+                "dataset": dataset_path,
+                "language": args.language,
+                "backend": args.backend,
+                "max_edit_distance": args.max_edit_distance,
+                "size": args.size,
+                "seed": args.seed,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+            },
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f"Regression: {name} {metric} {old:.4f} -> {new:.4f}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,22 @@
 import argparse
 import asyncio
+import collections
 import concurrent.futures
+import functools
+import multiprocessing
 import os
 import re
 import sys
 import time
+from typing import Iterable, TextIO
 
 from tqdm import tqdm
 from .file_manager import FileManager
+from src.correctors.backends import BACKENDS, DEFAULT_BACKEND
+from src.correctors.error_model import ErrorModel
 from src.correctors.pn_corrector import PeterNorvigCorrector
 from src.dataset.languages import alphabets
+from src.metrics import metrics
 
 
 def language_selector() -> str:
@@ -46,31 +53,87 @@ def input_correlates_to_language(language: str, text: str) -> bool:
     return all(char.lower() in alphabets[language] for char in clean_text)
 
 
-def process_text(text: str,
+# Words and the punctuation kept between them.
+TOKEN_PATTERN = re.compile(r'\w+|[\'\’.\-,?!":;\t\n]')
+WORD_PATTERN = re.compile(r'\w+')
+# Punctuation that ends the context of the next word.
+SENTENCE_END_PATTERN = re.compile(r'[.?!\n]')
+# Spaces before punctuation left by joining the tokens.
+SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+([\'\’.\-,?!":;])')
+
+
+def correct_text(text: str,
                  corrector: PeterNorvigCorrector,
-                 display_corrected: bool = True) -> str:
+                 show_progress: bool = False) -> str:
     """
-    Process (spell-correct) the input text.
+    Spell-correct the input text.
     Splits the text preserving punctuation, corrects only the words, and then
     cleans up extra spaces before punctuation.
+    If the corrector has a language model, every word is corrected in the
+    context of the two corrected words before it in the same sentence.
     """
-    start_time = time.time()
-
     # Split text preserving punctuation.
-    words_with_punct = re.findall(r'\w+|[\'\’.\-,?!":;\t\n]', text)
+    words_with_punct = TOKEN_PATTERN.findall(text)
+    if show_progress:
+        words_with_punct = tqdm(words_with_punct, desc="Processing text")
+    in_context = getattr(corrector, "language_model", None) is not None
 
     # Correct only words, while preserving punctuation.
     corrected_words = []
-    for word in tqdm(words_with_punct, desc="Processing text"):
-        if re.match(r'\w+', word):
-            corrected_words.append(corrector.correct(word))
+    previous: list[str] = []
+    for word in words_with_punct:
+        if WORD_PATTERN.match(word):
+            if in_context:
+                corrected = corrector.correct(word, previous)
+                # Conjoined words may be corrected to several words.
+                previous = (previous + corrected.lower().split())[-2:]
+            else:
+                corrected = corrector.correct(word)
+            corrected_words.append(corrected)
         else:
+            if SENTENCE_END_PATTERN.match(word):
+                previous = []
             corrected_words.append(word)
 
     corrected_text = ' '.join(corrected_words)
     # Remove extra spaces before punctuation.
-    corrected_text = re.sub(r'\s+([\'\’.\-,?!":;])', r'\1', corrected_text)
+    return SPACE_BEFORE_PUNCTUATION.sub(r'\1', corrected_text)
+
+
+def apply_corrections(text: str, corrections: dict[str, str]) -> str:
+    """
+    Replace the words of the text by their corrections, formatting the
+    result like correct_text does.
+    Words missing from corrections are kept as they are.
+    """
+    corrected_text = ' '.join(corrections.get(token, token)
+                              for token in TOKEN_PATTERN.findall(text))
+    return SPACE_BEFORE_PUNCTUATION.sub(r'\1', corrected_text)
+
+
+def correct_words(words: Iterable[str],
+                  corrector: PeterNorvigCorrector) -> dict[str, str]:
+    """
+    Return the correction of every given word.
+    """
+    return {word: corrector.correct(word) for word in words}
+
+
+def distinct_words(lines: Iterable[str]) -> set[str]:
+    """
+    Return the set of words occurring in the lines.
+    """
+    return {word for line in lines for word in WORD_PATTERN.findall(line)}
+
 
+def process_text(text: str,
+                 corrector: PeterNorvigCorrector,
+                 display_corrected: bool = True) -> str:
+    """
+    Process (spell-correct) the input text and report the processing time.
+    """
+    start_time = time.time()
+    corrected_text = correct_text(text, corrector, show_progress=True)
     end_time = time.time()
     if display_corrected:
         print("\nOriginal text:", text)
@@ -79,11 +142,211 @@ def process_text(text: str,
     return corrected_text
 
 
+def correct_lines(lines: list[str],
+                  corrector: PeterNorvigCorrector) -> list[str]:
+    """
+    Correct every line, keeping the line breaks at their ends.
+    Every distinct word of the lines is corrected only once.
+    """
+    corrections = correct_words(distinct_words(lines), corrector)
+    corrected_lines = []
+    for line in lines:
+        body = line.rstrip('\n')
+        corrected_lines.append(apply_corrections(body, corrections) +
+                               line[len(body):])
+    return corrected_lines
+
+
+# Corrector of a worker process of the process pool file mode.
+_worker_corrector: PeterNorvigCorrector | None = None
+
+
+def _init_worker(corrector: PeterNorvigCorrector) -> None:
+    """
+    Store the corrector of a newly started worker process.
+    With the fork start method the corrector is inherited from the parent
+    process instead of being pickled.
+    """
+    global _worker_corrector
+    _worker_corrector = corrector
+
+
+def _process_lines(lines: list[str]) -> list[str]:
+    """
+    Correct a range of lines in a worker process.
+    """
+    return correct_lines(lines, _worker_corrector)
+
+
+def _process_words(words: list[str]) -> dict[str, str]:
+    """
+    Correct a part of the distinct words of a document in a worker process.
+    """
+    return correct_words(words, _worker_corrector)
+
+
+def process_pool(corrector: PeterNorvigCorrector,
+                 workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """
+    Return a pool of worker processes that correct lines with corrector.
+    With the fork start method the workers share the dictionary and the
+    index of the parent process instead of receiving a copy.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    return concurrent.futures.ProcessPoolExecutor(
+        workers, mp_context=context,
+        initializer=_init_worker, initargs=(corrector,))
+
+
+def process_lines_in_processes(lines: list[str],
+                               corrector: PeterNorvigCorrector,
+                               workers: int) -> list[str]:
+    """
+    Correct the lines in a pool of worker processes.
+    The lines are split into a few contiguous ranges per worker and the
+    corrected ranges are put back together in the original order.
+    """
+    shard_size = max(1, -(-len(lines) // (workers * 4)))
+    shards = [lines[i:i + shard_size]
+              for i in range(0, len(lines), shard_size)]
+    with process_pool(corrector, workers) as executor:
+        return [line for shard in executor.map(_process_lines, shards)
+                for line in shard]
+
+
+def correct_document(lines: list[str],
+                     corrector: PeterNorvigCorrector,
+                     workers: int | None = None) -> list[str]:
+    """
+    Correct the lines of a whole document, correcting every distinct word
+    only once no matter how often it occurs.
+    If workers is given, the distinct words are split between that many
+    worker processes.
+    """
+    words = list(distinct_words(lines))
+    if workers:
+        shard_size = max(1, -(-len(words) // (workers * 4)))
+        shards = [words[i:i + shard_size]
+                  for i in range(0, len(words), shard_size)]
+        corrections = {}
+        with process_pool(corrector, workers) as executor:
+            for shard in executor.map(_process_words, shards):
+                corrections.update(shard)
+    else:
+        corrections = correct_words(words, corrector)
+    return [apply_corrections(line, corrections) for line in lines]
+
+
+def correct_stream(input_stream: TextIO,
+                   output_stream: TextIO,
+                   corrector: PeterNorvigCorrector,
+                   language: str,
+                   workers: int | None = None,
+                   buffer_size: int = 1024 * 1024) -> bool:
+    """
+    Correct a text stream chunk by chunk and write it to another stream.
+
+    Chunks of about buffer_size characters of whole lines are checked
+    against the selected language and corrected in a pool of threads, or
+    of worker processes if workers is given. Only a few chunks per worker
+    are read ahead of the output, so memory use does not depend on the
+    length of the stream.
+
+    :return: False if a chunk does not correspond to the language,
+        in which case the rest of the stream is not processed
+    """
+    if workers:
+        executor = process_pool(corrector, workers)
+        task = _process_lines
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor()
+        task = functools.partial(correct_lines, corrector=corrector)
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    pending: collections.deque = collections.deque()
+    with executor:
+        while True:
+            lines = input_stream.readlines(buffer_size)
+            if not lines:
+                break
+            if not input_correlates_to_language(language, ''.join(lines)):
+                for future in pending:
+                    future.cancel()
+                return False
+            pending.append(executor.submit(task, lines))
+            # Wait for the oldest chunk before reading further ahead.
+            if len(pending) >= max_pending:
+                output_stream.writelines(pending.popleft().result())
+        while pending:
+            output_stream.writelines(pending.popleft().result())
+    return True
+
+
+def output_path(file_path: str,
+                output_dir: str | None = None,
+                output_name: str | None = None) -> str:
+    """
+    Return the path of the corrected copy of a file, which keeps the
+    original file extension.
+    """
+    base = os.path.basename(file_path)
+    if '.' in base:
+        name_part, ext = base.rsplit('.', 1)
+        ext = '.' + ext
+    else:
+        name_part = base
+        ext = ''
+    if output_name:
+        out_filename = output_name + ext
+    else:
+        out_filename = name_part + "_corrected" + ext
+
+    if output_dir:
+        out_filename = os.path.join(output_dir, out_filename)
+    return out_filename
+
+
+def stream_file(file_path: str,
+                corrector: PeterNorvigCorrector,
+                language: str,
+                output_dir: str | None = None,
+                output_name: str | None = None,
+                workers: int | None = None) -> None:
+    """
+    Process a file chunk by chunk, without ever holding all of it in memory.
+
+    The output file is named as in process_file. It only appears once the
+    whole file has been corrected; if a chunk of the file does not
+    correspond to the selected language the process is aborted with an
+    error.
+    """
+    start_time = time.time()
+    out_filename = output_path(file_path, output_dir, output_name)
+    tmp_filename = out_filename + ".tmp"
+    with open(file_path, 'r', encoding='utf8') as input_file, \
+            open(tmp_filename, 'w', encoding='utf8') as output_file:
+        valid = correct_stream(input_file, output_file, corrector,
+                               language, workers=workers)
+    if not valid:
+        os.remove(tmp_filename)
+        print("Error: The file contains characters that do not correspond",
+              "to the selected language.")
+        sys.exit(1)
+    os.replace(tmp_filename, out_filename)
+    end_time = time.time()
+    print(f"\nTotal processing time: {(end_time - start_time):.4f} seconds")
+    print(f"Corrected file saved to {out_filename}")
+
+
 async def process_file(file_path: str,
                        corrector: PeterNorvigCorrector,
                        language: str,
                        output_dir: str | None = None,
-                       output_name: str | None = None) -> None:
+                       output_name: str | None = None,
+                       workers: int | None = None,
+                       dedupe: bool = False) -> None:
     """
     Process a file containing text to be corrected.
 
@@ -93,6 +356,10 @@ async def process_file(file_path: str,
 
     If output_dir and/or output_name are provided the output file will be saved
     accordingly (keeping the original file extension).
+
+    If workers is given, the lines are corrected in that many processes
+    instead of threads. If dedupe is set, every distinct word of the file
+    is corrected once and the corrections are then put in place.
     """
     start_time = time.time()
     manager = FileManager(file_path)
@@ -108,28 +375,18 @@ async def process_file(file_path: str,
         return process_text(line, corrector, display_corrected=False)
 
     lines = text.split('\n')
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = [executor.submit(process_line, line) for line in lines]
-        corrected_lines = [future.result() for future in futures]
-
-    corrected_text = '\n'.join(corrected_lines)
-
-    # Determine the output file name
-    base = os.path.basename(file_path)
-    if '.' in base:
-        name_part, ext = base.rsplit('.', 1)
-        ext = '.' + ext
-    else:
-        name_part = base
-        ext = ''
-    if output_name:
-        out_filename = output_name + ext
+    if dedupe:
+        corrected_lines = correct_document(lines, corrector, workers)
+    elif workers:
+        corrected_lines = process_lines_in_processes(lines, corrector,
+                                                     workers)
     else:
-        out_filename = name_part + "_corrected" + ext
-
-    if output_dir:
-        out_filename = os.path.join(output_dir, out_filename)
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            futures = [executor.submit(process_line, line) for line in lines]
+            corrected_lines = [future.result() for future in futures]
 
+    corrected_text = '\n'.join(corrected_lines)
+    out_filename = output_path(file_path, output_dir, output_name)
     manager.write_file(corrected_text, new_path=out_filename)
     end_time = time.time()
     print(f"\nTotal processing time: {(end_time - start_time):.4f} seconds")
@@ -138,7 +395,10 @@ async def process_file(file_path: str,
 
 def interactive_loop(corrector: PeterNorvigCorrector,
                      language: str,
-                     max_edit_distance: int) -> None:
+                     max_edit_distance: int,
+                     backend: str = DEFAULT_BACKEND,
+                     context_memory: int | None = None,
+                     typing: bool = False) -> None:
     """
     Run an interactive loop where the user may enter text to be corrected.
     The user may also change the language interactively by entering '!change'.
@@ -150,8 +410,11 @@ def interactive_loop(corrector: PeterNorvigCorrector,
         if text.strip() == "!change":
             language = language_selector()
             try:
-                corrector = PeterNorvigCorrector(f"src/dataset/{language}.txt",
-                                                 max_edit_distance)
+                corrector = PeterNorvigCorrector(
+                    f"src/dataset/{language}.txt", max_edit_distance,
+                    backend=backend, context_memory=context_memory,
+                    error_model=ErrorModel.for_language(language)
+                    if typing else None)
             except FileNotFoundError:
                 print("The dataset file was not found or is not yet added.")
             continue
@@ -162,11 +425,24 @@ def interactive_loop(corrector: PeterNorvigCorrector,
             process_text(text, corrector)
 
 
+def print_metrics(corrector: PeterNorvigCorrector,
+                  language: str,
+                  stream: TextIO = sys.stdout) -> None:
+    """
+    Print the time spent in each correction stage, the cache hit ratios
+    and the dictionary size.
+    """
+    corrector.export_metrics(language=language)
+    print("\n" + metrics.summary(), file=stream)
+
+
 def main() -> None:
     """
     The application supports two modes:
       - File mode: if an input file is specified via the -f/--file flag,
         the file will be processed and the corrected output will be saved.
+        With -s/--stream the file is processed chunk by chunk, and with
+        -f - the standard input is corrected to the standard output.
 
       - Interactive mode: if no file is specified, the user can enter text
         to be corrected interactively.
@@ -189,10 +465,63 @@ def main() -> None:
         default="en",
         help="Language of the text (default: en)."
     )
+    parser.add_argument(
+        "-b", "--backend",
+        type=str,
+        choices=list(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help=f"Candidate search index (default: {DEFAULT_BACKEND})."
+    )
+    parser.add_argument(
+        "-c", "--compile",
+        action="store_true",
+        help="Compile the dataset and its search index for a fast start."
+    )
+    parser.add_argument(
+        "-x", "--context",
+        type=int,
+        nargs="?",
+        const=8,
+        metavar="MB",
+        help="Correct words in the context of the previous ones, with a "
+             "language model of MB megabytes (default: 8)."
+    )
+    parser.add_argument(
+        "-t", "--typing",
+        action="store_true",
+        help="Rank corrections by a model of typing errors on the "
+             "keyboard of the language."
+    )
     parser.add_argument(
         "-f", "--file",
         type=str,
-        help="Path to the input file to be processed."
+        help="Path to the input file to be processed, "
+             "or - to correct the standard input to the standard output."
+    )
+    parser.add_argument(
+        "-s", "--stream",
+        action="store_true",
+        help="Correct the file chunk by chunk instead of loading all of it."
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        help="Number of processes correcting the file (default: threads)."
+    )
+    parser.add_argument(
+        "-u", "--dedupe",
+        action="store_true",
+        help="Correct every distinct word of the file only once."
+    )
+    parser.add_argument(
+        "-m", "--metrics",
+        action="store_true",
+        help="Print a summary of the time spent in each stage at the end."
+    )
+    parser.add_argument(
+        "-k", "--cache-snapshot",
+        type=str,
+        help="Cache snapshot file to start from and to save on exit."
     )
     parser.add_argument(
         "-o", "--output",
@@ -207,19 +536,50 @@ def main() -> None:
 
     args = parser.parse_args()
 
+    context_memory = args.context * 1024 * 1024 if args.context else None
+    error_model = ErrorModel.for_language(args.language) \
+        if args.typing else None
     try:
         corrector = PeterNorvigCorrector(f"src/dataset/{args.language}.txt",
-                                         args.max_edit_distance)
+                                         args.max_edit_distance,
+                                         backend=args.backend,
+                                         context_memory=context_memory,
+                                         error_model=error_model)
     except FileNotFoundError:
         print("The dataset file for the selected language was not found.")
         return
 
-    if args.file:
+    if args.cache_snapshot:
+        corrector.load_snapshot(args.cache_snapshot)
+
+    if args.compile:
+        print(f"Compiled dictionary saved to {corrector.compile()}")
+    elif args.file == "-":
+        if not correct_stream(sys.stdin, sys.stdout, corrector,
+                              args.language, workers=args.workers):
+            print("Error: The input contains characters that do not",
+                  "correspond to the selected language.", file=sys.stderr)
+            sys.exit(1)
+    elif args.file and args.stream:
+        stream_file(args.file, corrector, args.language,
+                    output_dir=args.output, output_name=args.name,
+                    workers=args.workers)
+    elif args.file:
         asyncio.run(process_file(args.file, corrector, args.language,
                                  output_dir=args.output,
-                                 output_name=args.name))
+                                 output_name=args.name,
+                                 workers=args.workers,
+                                 dedupe=args.dedupe))
     else:
-        interactive_loop(corrector, args.language, args.max_edit_distance)
+        interactive_loop(corrector, args.language, args.max_edit_distance,
+                         backend=args.backend, context_memory=context_memory,
+                         typing=args.typing)
+
+    if args.cache_snapshot:
+        corrector.save_snapshot(args.cache_snapshot)
+    if args.metrics:
+        print_metrics(corrector, args.language,
+                      sys.stderr if args.file == "-" else sys.stdout)
 
 
 if __name__ == '__main__':
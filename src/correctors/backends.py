@@ -0,0 +1,47 @@
+import os
+from typing import Callable, Dict, Iterable, Tuple
+
+from .bk_tree import BKTree
+from .symspell import SymmetricDeleteIndex
+from .trie import Trie
+from .vectorized import VectorizedIndex
+
+# Every backend is built from the vocabulary and the largest distance
+# it will be queried with, and exposes supports(max_distance) and
+# search(word, max_distance) -> {word: distance}.
+BACKENDS: Dict[str, Callable[[Iterable[str], int], object]] = {
+    "symspell": SymmetricDeleteIndex,
+    "bktree": lambda words, max_distance: BKTree(words),
+    "trie": lambda words, max_distance: Trie(words),
+    "numpy": lambda words, max_distance: VectorizedIndex(words),
+}
+
+DEFAULT_BACKEND = "symspell"
+
+_shared_indexes: Dict[Tuple[str, str], object] = {}
+
+
+def get_index(backend: str,
+              dataset_path: str,
+              words: Iterable[str],
+              max_distance: int) -> object:
+    """
+    Return the search index of the given backend for a dataset.
+    Indexes are built once per dataset and backend and shared by every
+    corrector in the process, as long as they support max_distance.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    key = (backend, os.path.abspath(dataset_path))
+    index = _shared_indexes.get(key)
+    if index is None or not index.supports(max_distance):
+        index = BACKENDS[backend](words, max_distance)
+        _shared_indexes[key] = index
+    return index
+
+
+def share_index(backend: str, dataset_path: str, index: object) -> None:
+    """
+    Make an already built index of a dataset available to get_index
+    """
+    _shared_indexes[(backend, os.path.abspath(dataset_path))] = index
@@ -0,0 +1,79 @@
+from typing import Dict, Iterable, List, Optional
+
+from .utils import damerau_levenstein, damerau_levenstein_unrestricted
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over a vocabulary.
+
+    Every child of a node is filed under its distance to that node, so a
+    range query of radius r around a word only has to descend into the
+    children whose distance lies in [d - r, d + r], where d is the
+    distance from the word to the node (triangle inequality).
+
+    The tree is keyed on the unrestricted Damerau-Levenstein distance,
+    because the optimal string alignment variant used by
+    damerau_levenstein breaks the triangle inequality for some strings
+    (e.g. "ca" -> "ac" -> "abc"). The unrestricted distance is never
+    greater, so the query finds a superset of the words within the radius
+    and the results are then measured with damerau_levenstein.
+    """
+    def __init__(self, words: Iterable[str]) -> None:
+        """
+        :param words: The vocabulary to index
+        """
+        # Every node is a [word, {distance: child node}] pair.
+        self._root: Optional[list] = None
+        self.size: int = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        """
+        Insert a word into the tree
+        """
+        if self._root is None:
+            self._root = [word, {}]
+            self.size = 1
+            return
+        node = self._root
+        while True:
+            distance = damerau_levenstein_unrestricted(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [word, {}]
+                self.size += 1
+                return
+            node = child
+
+    def supports(self, max_distance: int) -> bool:
+        """
+        A BK-tree can answer queries of any radius
+        """
+        return True
+
+    def search(self, word: str, max_distance: int) -> Dict[str, int]:
+        """
+        Return every word in the tree within max_distance of word,
+        mapped to its Damerau-Levenstein distance
+        """
+        result = {}
+        if self._root is None:
+            return result
+        stack: List[list] = [self._root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = damerau_levenstein_unrestricted(word, node_word)
+            if distance <= max_distance:
+                osa_distance = damerau_levenstein(word, node_word,
+                                                  max_distance)
+                if osa_distance <= max_distance:
+                    result[node_word] = osa_distance
+            low = distance - max_distance
+            high = distance + max_distance
+            stack.extend(child for key, child in children.items()
+                         if low <= key <= high)
+        return result
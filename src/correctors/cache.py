@@ -0,0 +1,266 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Mapping that holds at most max_entries entries and evicts the least
+    recently used one when it grows past that.
+
+    Pinned entries are kept apart from the others: they never count
+    towards the limit, are never evicted and are left alone by plain
+    assignments. Lookups through get are counted as hits or misses and
+    every eviction is counted too. Every operation holds the lock of the
+    cache, so it may be shared between threads.
+    """
+    def __init__(self, max_entries: Optional[int] = 10000) -> None:
+        """
+        :param max_entries: Maximum number of unpinned entries,
+            None for no limit
+        """
+        if max_entries is not None and max_entries < 0:
+            raise ValueError("max_entries must not be negative")
+        self.max_entries: Optional[int] = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._pinned: Dict[Hashable, Any] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the value of key, or default if it is not cached,
+        and record the lookup as a hit or a miss
+        """
+        with self._lock:
+            if key in self._pinned:
+                self.hits += 1
+                return self._pinned[key]
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def pinned(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the pinned value of key, or default if it is not pinned,
+        without recording a hit or a miss
+        """
+        with self._lock:
+            return self._pinned.get(key, default)
+
+    def pin(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value that is never evicted
+        """
+        self.pin_update(key, lambda _: value)
+
+    def pin_update(self,
+                   key: Hashable,
+                   update: Callable[[Any], Any]) -> None:
+        """
+        Pin the value returned by update, which is given the current
+        value of key (None if it is not cached), in a single step
+        """
+        with self._lock:
+            current = self._entries.pop(key, None)
+            current = self._pinned.get(key, current)
+            self._pinned[key] = update(current)
+
+    def snapshot(self) -> Tuple[List[Tuple[Hashable, Any]],
+                                Dict[Hashable, Any]]:
+        """
+        Return the unpinned entries, least recently used first,
+        and the pinned entries
+        """
+        with self._lock:
+            return list(self._entries.items()), dict(self._pinned)
+
+    def restore(self,
+                entries: List[Tuple[Hashable, Any]],
+                pinned: Dict[Hashable, Any]) -> None:
+        """
+        Add the entries of a snapshot that are not cached already
+        """
+        with self._lock:
+            for key, value in pinned.items():
+                if key not in self._pinned:
+                    self._entries.pop(key, None)
+                    self._pinned[key] = value
+            added = []
+            for key, value in entries:
+                if key not in self._pinned and key not in self._entries:
+                    self._entries[key] = value
+                    added.append(key)
+            # The entries cached before the restore are the most recent.
+            for key in list(self._entries):
+                if key not in added:
+                    self._entries.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the size of the cache and its hit, miss and eviction counts
+        """
+        with self._lock:
+            return {
+                "size": len(self._pinned) + len(self._entries),
+                "pinned": len(self._pinned),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            if key in self._pinned:
+                return self._pinned[key]
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            # Only pin and pin_update change pinned entries, so a result
+            # computed before a value was pinned cannot replace it.
+            if key in self._pinned:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+    def __getstate__(self) -> dict:
+        # Locks cannot be pickled, every copy gets its own.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._pinned or key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pinned) + len(self._entries)
+
+
+class StripedLRUCache:
+    """
+    LRU cache split into independently locked stripes by key hash.
+
+    Threads working on keys of different stripes never wait for each
+    other. Each stripe evicts on its own, so the cache holds about
+    max_entries unpinned entries in total rather than exactly that many.
+    """
+    def __init__(self,
+                 max_entries: Optional[int] = 10000,
+                 stripes: int = 16) -> None:
+        """
+        :param max_entries: Maximum number of unpinned entries,
+            None for no limit
+        :param stripes: Number of independently locked stripes
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be positive")
+        self.max_entries: Optional[int] = max_entries
+        stripe_entries = None
+        if max_entries is not None:
+            stripe_entries = -(-max_entries // stripes)
+        self._stripes: List[LRUCache] = [LRUCache(stripe_entries)
+                                         for _ in range(stripes)]
+
+    def _stripe(self, key: Hashable) -> LRUCache:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the value of key, or default if it is not cached,
+        and record the lookup as a hit or a miss
+        """
+        return self._stripe(key).get(key, default)
+
+    def pinned(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the pinned value of key, or default if it is not pinned,
+        without recording a hit or a miss
+        """
+        return self._stripe(key).pinned(key, default)
+
+    def pin(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value that is never evicted
+        """
+        self._stripe(key).pin(key, value)
+
+    def pin_update(self,
+                   key: Hashable,
+                   update: Callable[[Any], Any]) -> None:
+        """
+        Pin the value returned by update, which is given the current
+        value of key (None if it is not cached), in a single step
+        """
+        self._stripe(key).pin_update(key, update)
+
+    def snapshot(self) -> Tuple[List[Tuple[Hashable, Any]],
+                                Dict[Hashable, Any]]:
+        """
+        Return the unpinned entries of every stripe, least recently used
+        first within a stripe, and the pinned entries
+        """
+        entries: List[Tuple[Hashable, Any]] = []
+        pinned: Dict[Hashable, Any] = {}
+        for stripe in self._stripes:
+            stripe_entries, stripe_pinned = stripe.snapshot()
+            entries += stripe_entries
+            pinned.update(stripe_pinned)
+        return entries, pinned
+
+    def restore(self,
+                entries: List[Tuple[Hashable, Any]],
+                pinned: Dict[Hashable, Any]) -> None:
+        """
+        Add the entries of a snapshot that are not cached already
+        """
+        stripe_entries: List[list] = [[] for _ in self._stripes]
+        stripe_pinned: List[dict] = [{} for _ in self._stripes]
+        for key, value in entries:
+            stripe_entries[hash(key) % len(self._stripes)].append((key, value))
+        for key, value in pinned.items():
+            stripe_pinned[hash(key) % len(self._stripes)][key] = value
+        for stripe, part, part_pinned in zip(self._stripes, stripe_entries,
+                                             stripe_pinned):
+            stripe.restore(part, part_pinned)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the size of the cache and its hit, miss and eviction counts
+        """
+        totals: Dict[str, int] = {}
+        for stripe in self._stripes:
+            for name, value in stripe.stats().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def __getitem__(self, key: Hashable) -> Any:
+        return self._stripe(key)[key]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self._stripe(key)[key] = value
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._stripe(key)
+
+    def __len__(self) -> int:
+        return sum(len(stripe) for stripe in self._stripes)
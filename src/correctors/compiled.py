@@ -0,0 +1,99 @@
+import mmap
+import os
+import pickle
+import struct
+from collections.abc import Mapping
+from typing import Dict, Optional, Tuple
+
+# Artifact layout: a fixed header followed by a pickled payload.
+# The header holds the magic bytes, the format version and the size and
+# modification time of the source text the artifact was built from.
+MAGIC = b"SPCD"
+FORMAT_VERSION = 5
+_HEADER = struct.Struct("<4sIqq")
+
+
+def compiled_path(dataset_path: str) -> str:
+    """
+    Return the path of the compiled artifact for a dataset
+    """
+    return os.path.splitext(dataset_path)[0] + ".dict"
+
+
+def source_stamp(dataset_path: str) -> Tuple[int, int]:
+    """
+    Return the size and modification time of a dataset file
+    """
+    stat = os.stat(dataset_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def write_artifact(path: str, dataset_path: str, payload: object) -> None:
+    """
+    Pickle payload to path behind a header stamped with the current
+    size and modification time of the dataset it was built from
+    """
+    size, mtime = source_stamp(dataset_path)
+    data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    # Write to a temporary file first, so that a reader never sees
+    # a partially written artifact.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, size, mtime))
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path: str, dataset_path: str) -> Optional[object]:
+    """
+    Return the payload of the artifact at path, or None if there is none
+    or it was built from another version of the dataset
+    """
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with file:
+        if os.fstat(file.fileno()).st_size < _HEADER.size:
+            return None
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _read_payload(data, dataset_path)
+
+
+def _read_payload(data: mmap.mmap, dataset_path: str) -> Optional[object]:
+    """
+    Return the payload of a mapped artifact if its header is up to date
+    """
+    magic, version, size, mtime = _HEADER.unpack_from(data)
+    if (magic != MAGIC or version != FORMAT_VERSION or
+            (size, mtime) != source_stamp(dataset_path)):
+        return None
+    with memoryview(data) as view, view[_HEADER.size:] as payload:
+        return pickle.loads(payload)
+
+
+def write_compiled(dataset_path: str,
+                   words: Mapping,
+                   indexes: Dict[str, object],
+                   ngrams: Optional[object] = None) -> str:
+    """
+    Write the frequency table, the search indexes and the n-gram model
+    of a dataset to its compiled artifact and return the path of the
+    artifact
+    :param dataset_path: Path to the text file the data was built from
+    :param words: Word frequencies
+    :param indexes: Search indexes by backend name
+    :param ngrams: Language model of the dataset, if there is one
+    """
+    path = compiled_path(dataset_path)
+    write_artifact(path, dataset_path, {"words": words, "indexes": indexes,
+                                        "ngrams": ngrams})
+    return path
+
+
+def read_compiled(dataset_path: str) -> Optional[dict]:
+    """
+    Return the payload of the compiled artifact of a dataset,
+    or None if there is none or it is older than the dataset
+    """
+    return read_artifact(compiled_path(dataset_path), dataset_path)
@@ -0,0 +1,100 @@
+import math
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .utils import weighted_damerau_levenstein
+from ..dataset.languages import keyboards, sound_alikes
+
+# Cost of typing a key next to the intended one and of writing a letter
+# that sounds like the intended one, instead of 1 for any substitution.
+ADJACENT_KEY_COST = 0.5
+SOUND_ALIKE_COST = 0.5
+# Natural logarithm of how much less likely every unit of edit distance
+# makes a word in the noisy channel.
+EDIT_PENALTY = math.log(1000)
+
+_NO_COSTS: Mapping[str, float] = {}
+
+
+def adjacent_keys(rows: List[str]) -> Iterable[Tuple[str, str]]:
+    """
+    Yield the pairs of keys next to each other on a keyboard given by its
+    letter rows, each row shifted half a key right of the one above
+    """
+    for r, row in enumerate(rows):
+        for c, key in enumerate(row):
+            if c + 1 < len(row):
+                yield key, row[c + 1]
+            if r + 1 < len(rows):
+                below = rows[r + 1]
+                for other in below[max(0, c - 1):c + 1]:
+                    yield key, other
+
+
+class ErrorModel:
+    """
+    Noisy-channel model of typing errors.
+
+    The probability of typing a word w as x falls by EDIT_PENALTY for every
+    unit of their weighted Damerau-Levenstein distance, in which some
+    substitutions are cheaper than others, e.g. those of neighbouring keys.
+    The substitution costs are kept in one table per character, so the
+    distance kernel looks up each cost with a single dictionary access.
+    """
+    def __init__(self,
+                 substitution_costs: Dict[Tuple[str, str], float],
+                 transposition_cost: float = 1.0,
+                 edit_penalty: float = EDIT_PENALTY) -> None:
+        """
+        :param substitution_costs: Costs of substituting the first letter
+            of each pair by the second, or the other way round, if not 1
+        :param transposition_cost: Cost of swapping two adjacent letters
+        :param edit_penalty: Natural logarithm of how much less likely
+            every unit of distance makes a word
+        """
+        self.transposition_cost: float = transposition_cost
+        self.edit_penalty: float = edit_penalty
+        self._costs: Dict[str, Dict[str, float]] = {}
+        for (first, second), cost in substitution_costs.items():
+            for a, b in ((first, second), (second, first)):
+                costs = self._costs.setdefault(a, {})
+                costs[b] = min(cost, costs.get(b, 1.0))
+
+    @classmethod
+    def for_language(cls, language: str, **options) -> "ErrorModel":
+        """
+        Return the model of the keyboard layout and the sound-alike
+        letters of a language, see src.dataset.languages
+        """
+        costs: Dict[Tuple[str, str], float] = {}
+        for pair in adjacent_keys(keyboards.get(language, [])):
+            costs[pair] = ADJACENT_KEY_COST
+        for pair in sound_alikes.get(language, []):
+            costs[pair] = min(SOUND_ALIKE_COST, costs.get(pair, 1.0))
+        return cls(costs, **options)
+
+    def substitution_costs(self, word: str) -> List[Mapping[str, float]]:
+        """
+        Return the substitution cost tables of the characters of a word,
+        to be passed to distance when comparing it with many words
+        """
+        return [self._costs.get(char, _NO_COSTS) for char in word.lower()]
+
+    def distance(self,
+                 word: str,
+                 candidate: str,
+                 max_distance: float,
+                 costs: Optional[List[Mapping[str, float]]] = None) -> float:
+        """
+        Return the weighted distance of typing candidate as word, or a
+        value greater than max_distance if it exceeds it
+        :param costs: substitution_costs(word), if already computed
+        """
+        if costs is None:
+            costs = self.substitution_costs(word)
+        return weighted_damerau_levenstein(word.lower(), candidate,
+                                           max_distance, costs,
+                                           self.transposition_cost)
+
+    def __eq__(self, other: object) -> bool:
+        return (isinstance(other, ErrorModel) and
+                self.__dict__ == other.__dict__)
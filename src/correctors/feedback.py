@@ -0,0 +1,136 @@
+import queue
+import sqlite3
+from contextlib import closing
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# A confirmed correction: (id, language, word, correction).
+Feedback = Tuple[int, str, str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    language TEXT NOT NULL,
+    word TEXT NOT NULL,
+    correction TEXT NOT NULL,
+    created REAL NOT NULL
+)
+"""
+
+
+class FeedbackStore:
+    """
+    Append-only SQLite log of the corrections confirmed by users.
+
+    Corrections are queued by add and written by a background thread in
+    batches, so recording one never waits for the disk. The database is
+    in WAL mode, so any number of processes can read it while one of them
+    writes; a process catches up with the others through read_since.
+    """
+    def __init__(self,
+                 path: str,
+                 batch_size: int = 100,
+                 flush_interval: float = 0.5) -> None:
+        """
+        :param path: Path to the SQLite database, created if missing
+        :param batch_size: Largest number of corrections written at once
+        :param flush_interval: Seconds a queued correction may wait
+        """
+        self.path: str = path
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+        self._queue: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_batches,
+                                        name="feedback-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, language: str, word: str, correction: str) -> None:
+        """
+        Queue a confirmed correction for writing
+        """
+        self._queue.put((language, word, correction, time.time()))
+
+    def flush(self) -> None:
+        """
+        Wait until every queued correction is written
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        """
+        Write the queued corrections and stop the writer thread
+        """
+        self._queue.put(None)
+        self._writer.join()
+
+    def last_id(self) -> int:
+        """
+        Return the id of the latest written correction, 0 if there is none
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT MAX(id) FROM feedback").fetchone()
+        return row[0] or 0
+
+    def read_since(self,
+                   last_id: int = 0,
+                   language: Optional[str] = None) -> List[Feedback]:
+        """
+        Return the corrections written after the one with id last_id,
+        oldest first, optionally only those of one language
+        """
+        query = ("SELECT id, language, word, correction FROM feedback "
+                 "WHERE id > ?")
+        parameters: tuple = (last_id,)
+        if language is not None:
+            query += " AND language = ?"
+            parameters += (language,)
+        with closing(self._connect()) as connection:
+            return connection.execute(query + " ORDER BY id",
+                                      parameters).fetchall()
+
+    def _write_batches(self) -> None:
+        """
+        Write queued corrections until close is called
+        """
+        connection = self._connect()
+        running = True
+        while running:
+            batch = []
+            waiting = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    running = False
+                    break
+                if isinstance(item, threading.Event):
+                    waiting.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+            if batch:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO feedback "
+                        "(language, word, correction, created) "
+                        "VALUES (?, ?, ?, ?)", batch
+                    )
+            for event in waiting:
+                event.set()
+        connection.close()
@@ -0,0 +1,115 @@
+import hashlib
+from array import array
+from collections import Counter
+from typing import Iterator, List, Sequence
+
+# Largest value a counter of the sketch can hold.
+_MAX_COUNT = 2 ** 32 - 1
+# Weight of each step back from trigrams to bigrams to unigrams,
+# as in the stupid backoff scheme.
+BACKOFF = 0.4
+
+
+def ngrams(words: Sequence[str]) -> Iterator[str]:
+    """
+    Yield the bigrams and trigrams of a sequence of words,
+    each as its words joined by spaces
+    """
+    for i in range(1, len(words)):
+        yield words[i - 1] + " " + words[i]
+        if i >= 2:
+            yield words[i - 2] + " " + words[i - 1] + " " + words[i]
+
+
+def _largest_prime(limit: int) -> int:
+    """
+    Return the largest prime not greater than limit, or 2
+    """
+    for candidate in range(limit, 2, -1):
+        if candidate % 2 and all(candidate % d
+                                 for d in range(3, int(candidate ** 0.5) + 1,
+                                                2)):
+            return candidate
+    return 2
+
+
+class NGramModel:
+    """
+    Bigram and trigram counts of a corpus in a count-min sketch.
+
+    The sketch is a fixed number of rows of 32-bit counters, so the model
+    takes the same memory however large the corpus is. Every n-gram is
+    counted in one counter per row and its count is the smallest of them,
+    which may be too high when other n-grams share all of its counters
+    but is never too low.
+    """
+    def __init__(self, memory_bytes: int = 8 * 1024 * 1024,
+                 depth: int = 4) -> None:
+        """
+        :param memory_bytes: Size of the sketch in bytes
+        :param depth: Number of rows, more rows make wrong counts rarer
+            but every lookup slower
+        """
+        if depth < 1:
+            raise ValueError("depth must be positive")
+        self.memory_bytes: int = memory_bytes
+        self.depth: int = depth
+        # A prime width spreads the double hashing over the whole row.
+        self.width: int = _largest_prime(max(2, memory_bytes // (4 * depth)))
+        self._table: array = array('I', bytes(4 * depth * self.width))
+
+    def _slots(self, ngram: str) -> List[int]:
+        digest = hashlib.blake2b(ngram.encode('utf8'), digest_size=8).digest()
+        first = int.from_bytes(digest[:4], 'little')
+        step = int.from_bytes(digest[4:], 'little') | 1
+        return [row * self.width + (first + row * step) % self.width
+                for row in range(self.depth)]
+
+    def add(self, counts: Counter) -> None:
+        """
+        Add the counts of n-grams made by the ngrams function. Only the
+        smallest counters of each n-gram are raised (conservative update),
+        which keeps the overestimates small.
+        """
+        table = self._table
+        for ngram, count in counts.items():
+            slots = self._slots(ngram)
+            value = min(min(table[slot] for slot in slots) + count,
+                        _MAX_COUNT)
+            for slot in slots:
+                if table[slot] < value:
+                    table[slot] = value
+
+    def count(self, *words: str) -> int:
+        """
+        Return the estimated count of the bigram or trigram of words
+        """
+        table = self._table
+        return min(table[slot] for slot in self._slots(" ".join(words)))
+
+    def score(self,
+              word: str,
+              previous: Sequence[str],
+              unigrams: Counter,
+              total: int) -> float:
+        """
+        Return the stupid backoff score of word following the previous
+        words: the share of the occurrences of the two previous words that
+        it follows, or else of the previous word, weighted by BACKOFF for
+        each step back, or else its weighted unigram probability
+        :param unigrams: Word frequencies of the corpus
+        :param total: Number of words of the corpus
+        """
+        weight = 1.0
+        if len(previous) >= 2:
+            count = self.count(previous[-2], previous[-1], word)
+            if count:
+                history = max(self.count(previous[-2], previous[-1]), count)
+                return count / history
+            weight *= BACKOFF
+        if previous:
+            count = self.count(previous[-1], word)
+            if count:
+                return weight * count / max(unigrams[previous[-1]], count)
+            weight *= BACKOFF
+        return weight * unigrams[word] / total
@@ -1,8 +1,20 @@
-from typing import List, Set
+from typing import List, Sequence
+import concurrent.futures
+import heapq
+from array import array
+import math
+import os
 import re
 from collections import Counter
-from .utils import damerau_levenstein
-from typing import Generator
+from .backends import DEFAULT_BACKEND, get_index, share_index
+from .cache import StripedLRUCache
+from .compiled import (read_artifact, read_compiled, write_artifact,
+                       write_compiled)
+from .error_model import ErrorModel
+from .ngram import NGramModel, ngrams
+from .vocabulary import Vocabulary
+from ..metrics import metrics
+from typing import Callable, Dict, Generator, Optional
 
 
 def read_line_by_line_buffered(
@@ -28,6 +40,97 @@ def get_words(text: str) -> List[str]:
     return re.findall(r'\w+', text.lower())
 
 
+def count_shard(file_path: str,
+                start: int,
+                end: int,
+                buffer_size: int = 1024 * 1024) -> Counter:
+    """
+    Count the words in the bytes [start, end) of a file, which must begin
+    and end at line boundaries. Only buffer_size bytes of lines are held
+    in memory at a time.
+    """
+    counts = Counter()
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        position = start
+        while position < end:
+            lines = file.readlines(min(buffer_size, end - position))
+            if not lines:
+                break
+            chunk = []
+            for line in lines:
+                if position >= end:
+                    break
+                chunk.append(line)
+                position += len(line)
+            counts.update(get_words(b''.join(chunk).decode('utf8')))
+    return counts
+
+
+def shard_offsets(file_path: str, shards: int) -> List[int]:
+    """
+    Split a file into at most shards byte ranges that end at line
+    boundaries and return the offsets between them, including 0 and
+    the size of the file
+    """
+    size = os.path.getsize(file_path)
+    offsets = [0]
+    with open(file_path, 'rb') as file:
+        for shard in range(1, shards):
+            target = size * shard // shards
+            if target <= offsets[-1]:
+                continue
+            file.seek(target)
+            file.readline()
+            offset = file.tell()
+            if offset >= size:
+                break
+            offsets.append(offset)
+    offsets.append(size)
+    return offsets
+
+
+def count_words(file_path: str,
+                processes: int = 1,
+                buffer_size: int = 1024 * 1024) -> Counter:
+    """
+    Return the frequencies of the words in a file, reading it chunk by
+    chunk. With more than one process the file is split into shards at
+    line boundaries that are counted in parallel and merged.
+    """
+    offsets = shard_offsets(file_path, max(1, processes))
+    if len(offsets) <= 2:
+        return count_shard(file_path, 0, offsets[-1], buffer_size)
+    counts = Counter()
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        futures = [executor.submit(count_shard, file_path,
+                                   start, end, buffer_size)
+                   for start, end in zip(offsets, offsets[1:])]
+        for future in futures:
+            counts.update(future.result())
+    return counts
+
+
+def train_ngrams(file_path: str,
+                 memory_bytes: int,
+                 buffer_size: int = 1024 * 1024,
+                 flush_size: int = 100000) -> NGramModel:
+    """
+    Count the bigrams and trigrams of every line of a file in a model of
+    memory_bytes bytes. At most flush_size distinct n-grams are counted
+    exactly before they are added to the model.
+    """
+    model = NGramModel(memory_bytes)
+    counts = Counter()
+    for line in read_line_by_line_buffered(file_path, buffer_size):
+        counts.update(ngrams(get_words(line)))
+        if len(counts) >= flush_size:
+            model.add(counts)
+            counts = Counter()
+    model.add(counts)
+    return model
+
+
 def preserve_case(original: str, corrected: str) -> str:
     """
     Preserve the case style of the original word.
@@ -39,28 +142,162 @@ def preserve_case(original: str, corrected: str) -> str:
     return corrected.lower()
 
 
+# Number of most probable candidates rescored by the language model.
+CONTEXT_CANDIDATES = 10
+# Longest piece a word is split into by segment.
+MAX_SEGMENT_LENGTH = 24
+
+
+class CandidateIds(array):
+    """
+    Vocabulary ids of ranked candidates, as kept in the candidates cache.
+    Like RankedCandidates they may be only the first few of them.
+    """
+    def __new__(cls, ids: List[int], complete: bool) -> "CandidateIds":
+        return super().__new__(cls, 'I', ids)
+
+    def __init__(self, ids: List[int], complete: bool) -> None:
+        """
+        :param ids: The ids of the ranked candidates
+        :param complete: Whether every candidate is included
+        """
+        self.complete: bool = complete
+
+
+class RankedCandidates(list):
+    """
+    Candidates from the most to the least probable, which may be only
+    the first few of them
+    """
+    def __init__(self, candidates: List[str], complete: bool) -> None:
+        """
+        :param candidates: The ranked candidates
+        :param complete: Whether every candidate is included
+        """
+        super().__init__(candidates)
+        self.complete: bool = complete
+
+
 class PeterNorvigCorrector:
-    """Spelling corrector utilizing Peter Norvig's approach"""
-    def __init__(self, dataset_path: str, max_distance: int = 3) -> None:
+    """
+    Spelling corrector utilizing Peter Norvig's approach.
+
+    A corrector may be shared between threads. The dictionary and the
+    search index are only read after construction, the caches lock one
+    stripe of keys at a time, and cached candidate lists are never
+    modified in place, so callers must not modify them either.
+    """
+    def __init__(self,
+                 dataset_path: str,
+                 max_distance: int = 3,
+                 backend: str = DEFAULT_BACKEND,
+                 processes: int = 1,
+                 cache_size: Optional[int] = 10000,
+                 cache_stripes: int = 16,
+                 snapshot_path: Optional[str] = None,
+                 context_memory: Optional[int] = None,
+                 error_model: Optional[ErrorModel] = None) -> None:
         """
         Initialize the corrector with a dataset file path
         :param dataset_path: Path to the text file containing the training data
         :param max_distance: Maximum Damerau-Levenshtein distance to consider
+        :param backend: Candidate search index, one of backends.BACKENDS
+        :param processes: Number of processes counting the dataset words
+        :param cache_size: Maximum number of words each cache remembers,
+            None for no limit
+        :param cache_stripes: Number of independently locked parts
+            of each cache
+        :param snapshot_path: Cache snapshot to load before the first
+            correction, see save_snapshot
+        :param context_memory: Size in bytes of the bigram and trigram
+            model used to correct words in context, None for no model
+        :param error_model: Typing error model ranking all candidates
+            within max_distance by how likely they are to be typed as the
+            word, None to rank only the nearest ones by probability
         """
 
-        self.words_dict: Counter = Counter(
-            get_words(
-                '\n'.join(
-                    list(
-                        read_line_by_line_buffered(dataset_path)
-                        )
-                    )
-                )
-            )
-        self.word_count: int = sum(self.words_dict.values())
+        compiled = read_compiled(dataset_path)
+        language_model = None
+        if compiled is None:
+            words = Vocabulary(count_words(dataset_path, processes))
+        else:
+            words = compiled["words"]
+            for name, index in compiled["indexes"].items():
+                share_index(name, dataset_path, index)
+            language_model = compiled.get("ngrams")
+        if context_memory is None:
+            language_model = None
+        elif (language_model is None or
+                language_model.memory_bytes != context_memory):
+            language_model = train_ngrams(dataset_path, context_memory)
+        self.language_model: Optional[NGramModel] = language_model
+        self.words_dict: Vocabulary = words
+        self.dataset_path: str = dataset_path
+        self.word_count: int = self.words_dict.total
+        self.max_word_length: int = min(max(self.words_dict.max_length, 1),
+                                        MAX_SEGMENT_LENGTH)
         self.max_distance: int = max_distance
-        self._correction_cache: dict = {}
-        self._candidates_cache: dict = {}
+        self.error_model: Optional[ErrorModel] = error_model
+        self._correction_cache: StripedLRUCache = \
+            StripedLRUCache(cache_size, cache_stripes)
+        self._candidates_cache: StripedLRUCache = \
+            StripedLRUCache(cache_size, cache_stripes)
+        self._snapshot_path: Optional[str] = snapshot_path
+        self.backend: str = backend
+        self._index = get_index(backend, dataset_path,
+                                self.words_dict, max_distance)
+
+    def compile(self) -> str:
+        """
+        Save the word frequencies and the search index to the compiled
+        artifact of the dataset, so that later correctors load them
+        instead of reading the dataset again
+        :return: Path of the compiled artifact
+        """
+        return write_compiled(self.dataset_path, self.words_dict,
+                              {self.backend: self._index},
+                              self.language_model)
+
+    def save_snapshot(self, path: str) -> None:
+        """
+        Save the contents of both caches, so that a later corrector of the
+        same dataset and maximum distance can start with them
+        :param path: Path of the snapshot file
+        """
+        self.__load_pending_snapshot()
+        write_artifact(path, self.dataset_path, {
+            "max_distance": self.max_distance,
+            "error_model": self.error_model,
+            "corrections": self._correction_cache.snapshot(),
+            "candidates": self._candidates_cache.snapshot(),
+        })
+
+    def load_snapshot(self, path: str) -> bool:
+        """
+        Add the cache entries of a snapshot that are not cached already.
+        Snapshots of another version of the dataset, of another maximum
+        distance or of another error model are ignored.
+        :param path: Path of the snapshot file
+        :return: Whether the snapshot was loaded
+        """
+        snapshot = read_artifact(path, self.dataset_path)
+        if (snapshot is None or
+                snapshot["max_distance"] != self.max_distance or
+                snapshot.get("error_model") != self.error_model):
+            return False
+        self._correction_cache.restore(*snapshot["corrections"])
+        self._candidates_cache.restore(*snapshot["candidates"])
+        return True
+
+    def __load_pending_snapshot(self) -> None:
+        """
+        Load the snapshot given to the constructor, the first time the
+        caches are needed
+        """
+        path = self._snapshot_path
+        if path is not None:
+            self._snapshot_path = None
+            self.load_snapshot(path)
 
     def prob(self, word: str) -> float:
         """
@@ -68,82 +305,352 @@ class PeterNorvigCorrector:
         """
         return self.words_dict[word] / self.word_count
 
-    def correct(self, word: str) -> str:
+    def log_prob(self, word: str) -> float:
+        """
+        Return the natural logarithm of the probability of the word,
+        -inf if it is not in the dictionary
+        """
+        word_id = self.words_dict.word_id(word)
+        if word_id is None:
+            return -math.inf
+        return self.words_dict.log_prob(word_id)
+
+    def correct(self, word: str, previous: Sequence[str] = ()) -> str:
         """
         Return the most probable spelling correction for the word
+        :param previous: The words before it in the sentence, lowercase,
+            which are used to pick the correction if there is a language
+            model (see context_memory)
         """
+        self.__load_pending_snapshot()
+        with metrics.timer("spelling_correct_seconds"):
+            if self.language_model is not None and previous:
+                return self.__correct_in_context(word, previous)
+            return self.__correct(word)
+
+    def __correct(self, word: str) -> str:
         # Words with less than 3 characters are not corrected, because
         # without grammar model is nearly impossible to be accurate
         if len(word) < 3:
             return word
 
         lower_word = word.lower()
-        if lower_word in self._correction_cache:
-            return preserve_case(word, self._correction_cache[lower_word])
+        with metrics.timer("spelling_stage_seconds", stage="correction_cache"):
+            cached = self._correction_cache.get(lower_word)
+        if cached is not None:
+            return preserve_case(word, cached)
         elif word in self.words_dict:
             return word
 
-        correction = max(self.candidates(word), key=self.prob)
+        # The candidates are ranked, the first is the most probable.
+        correction = self.candidates(word, 1)[0]
+        if correction not in self.words_dict:
+            correction = self.__split(lower_word) or correction
         self._correction_cache[lower_word] = correction
         return preserve_case(word, correction)
 
-    def candidates(self, word: str) -> List[str]:
+    def __correct_in_context(self, word: str, previous: Sequence[str]) -> str:
+        # Corrections confirmed by the user win over the context, even for
+        # dictionary words. Other cached corrections were chosen without
+        # the context, so they are not used.
+        confirmed = self._correction_cache.pinned(word.lower())
+        if confirmed is not None:
+            return preserve_case(word, confirmed)
+        # The previous words make even two letter words worth correcting.
+        if len(word) < 2 or word in self.words_dict:
+            return word
+
+        candidates = self.candidates(word, CONTEXT_CANDIDATES)
+        # Corrections confirmed by the user are kept in plain lists.
+        if not isinstance(candidates, RankedCandidates):
+            return preserve_case(word, candidates[0])
+        if candidates[0] not in self.words_dict:
+            return preserve_case(word, self.__split(word.lower()) or word)
+        with metrics.timer("spelling_stage_seconds", stage="context"):
+            correction = max(candidates, key=lambda w: (
+                self.language_model.score(w, previous, self.words_dict,
+                                          self.word_count),
+                self.prob(w)
+            ))
+        return preserve_case(word, correction)
+
+    def segment(self, text: str) -> List[str]:
+        """
+        Split text written without spaces into its most probable sequence
+        of words and correct the pieces that are not dictionary words.
+        """
+        # Like correct, pieces of less than 3 characters are kept as they are.
+        return [w if w in self.words_dict or len(w) < 3
+                else self.candidates(w, 1)[0]
+                for w in self.__pieces(text.lower())]
+
+    def __pieces(self, text: str) -> List[str]:
+        """
+        Return the most probable sequence of pieces, dictionary words or
+        not, the lowercase text is made of.
+
+        Every end position of the text is given the most probable way to
+        split the text up to it, from the best splits of the at most
+        max_word_length positions before it, so the work grows linearly
+        with the length of the text.
+        """
+        log_total = math.log(self.word_count)
+        word_id = self.words_dict.word_id
+        # Probability of the best split of text[:i] and where its last
+        # word starts.
+        best = [0.0] + [-math.inf] * len(text)
+        starts = [0] * (len(text) + 1)
+        for end in range(1, len(text) + 1):
+            for start in range(max(0, end - self.max_word_length), end):
+                piece_id = word_id(text[start:end])
+                if piece_id is not None:
+                    log_prob = self.words_dict.log_prob(piece_id)
+                else:
+                    # Unknown pieces are less probable the longer they are.
+                    log_prob = (math.log(10) - log_total -
+                                (end - start) * math.log(10))
+                if best[start] + log_prob > best[end]:
+                    best[end] = best[start] + log_prob
+                    starts[end] = start
+        words = []
+        end = len(text)
+        while end > 0:
+            words.append(text[starts[end]:end])
+            end = starts[end]
+        words.reverse()
+        return words
+
+    def __split(self, word: str) -> Optional[str]:
+        """
+        Return the words the word is made of, separated by spaces, or None
+        if it cannot be split into dictionary words. The pieces are not
+        corrected, so a word is never replaced by words it is not made of.
+        """
+        with metrics.timer("spelling_stage_seconds", stage="segmentation"):
+            words = self.__pieces(word)
+        if len(words) > 1 and all(w in self.words_dict for w in words):
+            return " ".join(words)
+        return None
+
+    def candidates(self,
+                   word: str,
+                   k: Optional[int] = None,
+                   progress: Optional[Callable[[List[str]], None]] = None
+                   ) -> List[str]:
         """
         Generate possible spelling corrections for the word
         and cache them for future use
+        :param k: Return only the k most probable corrections
+        :param progress: If given, the search widens one distance at a
+            time and progress is called with the best corrections found
+            so far whenever a search that is not the last finds any
         """
+        self.__load_pending_snapshot()
+        with metrics.timer("spelling_candidates_seconds"):
+            return self.__candidates(word, k, progress)
+
+    def __candidates(self,
+                     word: str,
+                     k: Optional[int],
+                     progress: Optional[Callable[[List[str]], None]] = None
+                     ) -> List[str]:
         lower_word = word.lower()
-        if lower_word in self._candidates_cache:
-            return self._candidates_cache[lower_word]
-
-        candidates = self.__known([word])
-        if candidates:
-            result = sorted(candidates,
-                            key=lambda w: (self.prob(w), w),
-                            reverse=True)
-            self._candidates_cache[lower_word] = result
-            return result
-
-        for distance in range(1, self.max_distance + 1):
-            candidates = self.__get_words_at_distance(word, distance)
-            if candidates:
-                result = sorted(candidates,
-                                key=lambda w: (self.prob(w), w),
-                                reverse=True)
+        with metrics.timer("spelling_stage_seconds", stage="candidates_cache"):
+            cached = self._candidates_cache.get(lower_word)
+        # Plain lists of words were confirmed by the user and always hit.
+        if cached is not None and (not isinstance(cached, CandidateIds) or
+                                   cached.complete or
+                                   (k is not None and len(cached) >= k)):
+            return self.__decode(word, cached, k)
+
+        word_id = self.words_dict.word_id(word)
+        if word_id is not None:
+            ids = [word_id]
+        else:
+            neighbours = self.__search(word, k, progress)
+            if self.error_model is not None:
+                result = self.__channel_rank(word, neighbours, k)
                 self._candidates_cache[lower_word] = result
-                return result
+                return self.__decode(word, result, k)
+            distances = [d for d in neighbours.values() if d > 0]
+            ids = []
+            if distances:
+                ids = self.__ids_at_distance(neighbours, min(distances))
 
-        self._candidates_cache[lower_word] = [word]
-        return [word]
+        result = self.__rank(ids, k)
+        self._candidates_cache[lower_word] = result
+        return self.__decode(word, result, k)
 
-    def __known(self, words: List[str]) -> Set[str]:
+    def __search(self,
+                 word: str,
+                 k: Optional[int],
+                 progress: Optional[Callable[[List[str]], None]]
+                 ) -> Dict[str, int]:
         """
-        Return the subset of words that are actually in the dictionary
+        Return the dictionary words within max_distance of word that the
+        candidates are ranked from, mapped to their distances. With
+        progress, search one distance after the other and report the
+        candidates of every stage that finds any.
         """
-        return set(w for w in words if w in self.words_dict)
+        distances = range(1, self.max_distance + 1) if progress else \
+            [self.max_distance]
+        for distance in distances:
+            with metrics.timer("spelling_stage_seconds", stage="search"):
+                neighbours = self._index.search(word, distance)
+            if distance == self.max_distance or \
+                    not any(d > 0 for d in neighbours.values()):
+                continue
+            # Without an error model only the nearest words are ranked,
+            # so the first stage that finds any has the final result.
+            if self.error_model is None:
+                break
+            progress(self.__decode(
+                word, self.__channel_rank(word, neighbours, k), k
+            ))
+        return neighbours
 
-    def __get_words_at_distance(self, word: str, distance: int) -> Set[str]:
+    def __rank(self, ids: List[int], k: Optional[int]) -> "CandidateIds":
         """
-        Return all strings that have a
-        specific Damerau-Levenshtein distance from word
+        Return the ids of the k most probable candidates (all if k is
+        None), from the most to the least probable
         """
-        return self.__known(w for w in self.words_dict.keys()
-                            if damerau_levenstein(word, w) == distance)
+        with metrics.timer("spelling_stage_seconds", stage="ranking"):
+            ranked = self.words_dict.rank(ids, k)
+        return CandidateIds(ranked, len(ranked) == len(ids))
+
+    def __channel_rank(self,
+                       word: str,
+                       neighbours: Dict[str, int],
+                       k: Optional[int]) -> "CandidateIds":
+        """
+        Return the ids of the k neighbours (all if k is None) most likely
+        to have been typed as word, from the most to the least likely:
+        their log-probability less the edit penalty of their weighted
+        distance from word.
+
+        The neighbours are measured from the most probable down. Once k of
+        them are kept, a neighbour only makes it if its distance is small
+        enough to beat the k-th, and the distance kernel stops as soon as
+        it is not; when even distance 0 cannot, the rest are skipped.
+        """
+        model = self.error_model
+        vocabulary = self.words_dict
+        costs = model.substitution_costs(word)
+        ids = self.__ids_at_distance(neighbours, None)
+        # The k most likely so far, least likely first, ties broken
+        # like Vocabulary.rank.
+        best: List[tuple] = []
+        with metrics.timer("spelling_stage_seconds", stage="ranking"):
+            for word_id in vocabulary.rank(ids):
+                log_prob = vocabulary.log_prob(word_id)
+                bound = self.max_distance
+                if k is not None and len(best) >= k:
+                    bound = min(bound,
+                                (log_prob - best[0][0]) / model.edit_penalty)
+                    if bound < 0:
+                        break
+                distance = model.distance(word, vocabulary.word(word_id),
+                                          bound, costs)
+                if distance > bound:
+                    continue
+                item = (log_prob - model.edit_penalty * distance, word_id)
+                if k is None or len(best) < k:
+                    heapq.heappush(best, item)
+                else:
+                    heapq.heappushpop(best, item)
+        ranked = [word_id for _, word_id in sorted(best, reverse=True)]
+        return CandidateIds(ranked, k is None or len(ranked) == len(ids))
+
+    def __decode(self,
+                 word: str,
+                 cached: List,
+                 k: Optional[int] = None) -> List[str]:
+        """
+        Return the first k (all if k is None) of the cached candidates of
+        word as words. Ranked candidates are returned in a RankedCandidates
+        list, the word itself if it has none.
+        """
+        if not isinstance(cached, CandidateIds):
+            return cached if k is None else cached[:k]
+        if not cached:
+            return RankedCandidates([word], True)
+        ids = cached if k is None else cached[:k]
+        return RankedCandidates([self.words_dict.word(i) for i in ids],
+                                cached.complete and len(ids) == len(cached))
+
+    def cached_candidates(self, word: str) -> Optional[List[str]]:
+        """
+        Return the candidates of the word if they are already cached,
+        without searching for them
+        """
+        self.__load_pending_snapshot()
+        cached = self._candidates_cache.get(word.lower())
+        return None if cached is None else self.__decode(word, cached)
+
+    def completions(self, prefix: str, limit: int = 5) -> List[str]:
+        """
+        Return the most probable dictionary words starting with prefix
+        """
+        trie = get_index("trie", self.dataset_path,
+                         self.words_dict, self.max_distance)
+        ids = map(self.words_dict.word_id, trie.complete(prefix.lower()))
+        return [self.words_dict.word(i)
+                for i in self.words_dict.rank(ids, limit)]
+
+    def __ids_at_distance(self,
+                          neighbours: Dict[str, int],
+                          distance: Optional[int]) -> List[int]:
+        """
+        Return the ids of the dictionary words among the neighbours found
+        by the index that have a specific Damerau-Levenshtein distance
+        from word, or any distance but 0 if distance is None
+        """
+        ids = (self.words_dict.word_id(w) for w, d in neighbours.items()
+               if d == distance or (distance is None and d > 0))
+        return [word_id for word_id in ids if word_id is not None]
 
     def update_cache(self, word: str, correction: str) -> None:
         """
         When the user confirms a correction,
         update the caches so that the chosen
         correction is now at the top of the candidate list.
+        Confirmed corrections are pinned and never evicted.
         """
         lower_word = word.lower()
-        self._correction_cache[lower_word] = correction
+        self._correction_cache.pin(lower_word, correction)
 
-        if lower_word not in self._candidates_cache:
-            self._candidates_cache[lower_word] = [correction]
-        else:
-            candidates = self._candidates_cache[lower_word]
-            if correction in candidates:
-                candidates.remove(correction)
-            candidates.insert(0, correction)
-            self._candidates_cache[lower_word] = candidates
+        def promote(candidates: Optional[List]) -> List[str]:
+            # Build a new list, as the cached one may be in use elsewhere.
+            if candidates is not None:
+                candidates = self.__decode(word, candidates)
+            others = [w for w in candidates or [] if w != correction]
+            return [correction] + others
+
+        self._candidates_cache.pin_update(lower_word, promote)
+
+    def export_metrics(self, **labels: str) -> None:
+        """
+        Set the dictionary size and cache gauges of the shared metrics
+        registry to the current values of this corrector
+        :param labels: Labels that tell this corrector apart, e.g. language
+        """
+        metrics.set_gauge("spelling_dictionary_words",
+                          len(self.words_dict), **labels)
+        for cache, stats in self.cache_stats().items():
+            lookups = stats["hits"] + stats["misses"]
+            metrics.set_gauge("spelling_cache_entries", stats["size"],
+                              cache=cache, **labels)
+            metrics.set_gauge("spelling_cache_evictions", stats["evictions"],
+                              cache=cache, **labels)
+            metrics.set_gauge("spelling_cache_hit_ratio",
+                              stats["hits"] / lookups if lookups else 0.0,
+                              cache=cache, **labels)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return the size, hit, miss and eviction counts of both caches
+        """
+        return {
+            "corrections": self._correction_cache.stats(),
+            "candidates": self._candidates_cache.stats(),
+        }
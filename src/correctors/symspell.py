@@ -0,0 +1,115 @@
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Set
+
+from .utils import damerau_levenstein
+from .vocabulary import Vocabulary
+
+# Only the deletes of the first PREFIX_LENGTH characters of every word are
+# indexed, which bounds the number of variants of long words.
+PREFIX_LENGTH = 7
+
+
+def get_deletes(word: str, max_distance: int) -> Set[str]:
+    """
+    Return every string that can be produced from word by deleting
+    up to max_distance characters (the word itself included)
+    """
+    deletes = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {
+            w[:i] + w[i + 1:]
+            for w in frontier
+            for i in range(len(w))
+        } - deletes
+        if not frontier:
+            break
+        deletes |= frontier
+    return deletes
+
+
+class SymmetricDeleteIndex:
+    """
+    Symmetric delete (SymSpell) candidate index.
+
+    Every vocabulary word is stored under all of its delete variants.
+    Two words within Damerau-Levenstein distance d always share a variant
+    reachable by at most d deletions from each of them, so a lookup only
+    has to verify the words filed under the deletes of the query.
+    The same holds for the prefixes of the same length of the two words,
+    so only the deletes of the first prefix_length characters are stored
+    and long words take no more variants than short ones.
+
+    Words are filed by their ids in the vocabulary. Most variants belong
+    to a single word and map straight to its id; the ids of the words
+    sharing a variant are stored in one flat array instead, as their
+    number followed by the ids, and the variant maps to -1 - the position
+    of that number.
+    """
+    def __init__(self,
+                 words: Iterable[str],
+                 max_distance: int = 3,
+                 prefix_length: int = PREFIX_LENGTH) -> None:
+        """
+        :param words: The vocabulary to index, best a Vocabulary, whose
+            words the index then shares
+        :param max_distance: The largest distance the index can answer
+        :param prefix_length: Number of leading characters of every word
+            whose deletes are indexed, raised above max_distance if needed
+        """
+        if not isinstance(words, Vocabulary):
+            words = Vocabulary(Counter(words))
+        self.max_distance: int = max_distance
+        # A prefix not longer than the distance would share its empty
+        # variant with every word.
+        self.prefix_length: int = max(prefix_length, max_distance + 1)
+        self._vocabulary: Vocabulary = words
+        deletes = defaultdict(list)
+        for word_id, word in enumerate(words):
+            for variant in get_deletes(word[:self.prefix_length],
+                                       max_distance):
+                deletes[variant].append(word_id)
+        self._postings: array = array('I')
+        for variant, ids in deletes.items():
+            if len(ids) == 1:
+                deletes[variant] = ids[0]
+            else:
+                deletes[variant] = -1 - len(self._postings)
+                self._postings.append(len(ids))
+                self._postings.extend(ids)
+        self._deletes: Dict[str, int] = dict(deletes)
+
+    def supports(self, max_distance: int) -> bool:
+        """
+        Return whether the index can answer queries of that radius
+        """
+        return max_distance <= self.max_distance
+
+    def search(self, word: str, max_distance: int) -> Dict[str, int]:
+        """
+        Return every indexed word within max_distance of word,
+        mapped to its Damerau-Levenstein distance
+        """
+        if not self.supports(max_distance):
+            raise ValueError(
+                f"Index was built for distances up to {self.max_distance}"
+            )
+        seen = set()
+        for variant in get_deletes(word[:self.prefix_length], max_distance):
+            entry = self._deletes.get(variant)
+            if entry is None:
+                continue
+            if entry >= 0:
+                seen.add(entry)
+            else:
+                start = -entry
+                seen.update(self._postings[start:
+                                           start + self._postings[start - 1]])
+        result = {}
+        for word_id in seen:
+            candidate = self._vocabulary.word(word_id)
+            distance = damerau_levenstein(word, candidate, max_distance)
+            if distance <= max_distance:
+                result[candidate] = distance
+        return result
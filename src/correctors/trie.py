@@ -0,0 +1,112 @@
+from typing import Dict, Iterable, List
+
+# Key under which a trie node stores the word that ends at it.
+_WORD = None
+
+
+class Trie:
+    """
+    Prefix tree over a vocabulary.
+
+    A search walks the tree keeping one Damerau-Levenstein row per node,
+    the distances between the prefix spelled by the node and every prefix
+    of the query. Words sharing a prefix share the rows computed for it,
+    and a branch is abandoned once every value in its row exceeds the
+    maximum distance, since no word below it can get closer.
+    """
+    def __init__(self, words: Iterable[str]) -> None:
+        """
+        :param words: The vocabulary to index
+        """
+        self._root: dict = {}
+        self.size: int = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        """
+        Insert a word into the trie
+        """
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+        if _WORD not in node:
+            node[_WORD] = word
+            self.size += 1
+
+    def __contains__(self, word: str) -> bool:
+        node = self.__find(word)
+        return node is not None and _WORD in node
+
+    def supports(self, max_distance: int) -> bool:
+        """
+        A trie can answer queries of any radius
+        """
+        return True
+
+    def search(self, word: str, max_distance: int) -> Dict[str, int]:
+        """
+        Return every word in the trie within max_distance of word,
+        mapped to its Damerau-Levenstein distance
+        """
+        result = {}
+        first_row = list(range(len(word) + 1))
+        if _WORD in self._root and first_row[-1] <= max_distance:
+            result[self._root[_WORD]] = first_row[-1]
+        # Each entry is (node, its char, parent char, parent row,
+        # grandparent row); the row of the node is computed when popped.
+        stack = [(child, char, None, first_row, None)
+                 for char, child in self._root.items() if char is not _WORD]
+        while stack:
+            node, char, prev_char, prev_row, prev_prev_row = stack.pop()
+            row = [prev_row[0] + 1]
+            for j in range(1, len(word) + 1):
+                cost = 0 if word[j - 1] == char else 1
+                value = min(
+                    prev_row[j] + 1,         # deletion
+                    row[j - 1] + 1,          # insertion
+                    prev_row[j - 1] + cost   # substitution
+                )
+                # Check for transposition
+                if (prev_prev_row is not None and j > 1 and
+                        word[j - 1] == prev_char and
+                        word[j - 2] == char and
+                        char != prev_char):
+                    value = min(value, prev_prev_row[j - 2] + 1)
+                row.append(value)
+            if _WORD in node and row[-1] <= max_distance:
+                result[node[_WORD]] = row[-1]
+            if min(row) <= max_distance:
+                stack.extend((child, child_char, char, row, prev_row)
+                             for child_char, child in node.items()
+                             if child_char is not _WORD)
+        return result
+
+    def complete(self, prefix: str) -> List[str]:
+        """
+        Return every word in the trie that starts with prefix
+        """
+        node = self.__find(prefix)
+        if node is None:
+            return []
+        words = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char is _WORD:
+                    words.append(child)
+                else:
+                    stack.append(child)
+        return words
+
+    def __find(self, prefix: str) -> dict | None:
+        """
+        Return the node spelled by prefix, if there is one
+        """
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
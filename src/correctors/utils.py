@@ -1,29 +1,142 @@
-def damerau_levenstein(s1: str, s2: str) -> int:
+from typing import Mapping, Sequence
+
+
+def damerau_levenstein(s1: str,
+                       s2: str,
+                       max_distance: int | None = None) -> int:
     """
-    Return the Damerau-Levenstein distance between two strings
+    Return the Damerau-Levenstein distance between two strings.
+    When max_distance is given, only the diagonal band of that width is
+    computed and max_distance + 1 is returned as soon as the distance is
+    known to exceed it.
     """
-    d = {}
     lenstr1 = len(s1)
     lenstr2 = len(s2)
-    for i in range(-1, lenstr1 + 1):
-        d[(i, -1)] = i + 1
-    for j in range(-1, lenstr2 + 1):
-        d[(-1, j)] = j + 1
-    for i in range(lenstr1):
-        for j in range(lenstr2):
-            if s1[i] == s2[j]:
+    if max_distance is None:
+        max_distance = max(lenstr1, lenstr2)
+    bound = max_distance + 1
+    if abs(lenstr1 - lenstr2) > max_distance:
+        return bound
+    # Every cell is capped at bound, which is also the value of the cells
+    # outside the band, so the capped rows stay exact up to max_distance.
+    prev_prev_row = None
+    prev_row = [min(j, bound) for j in range(lenstr2 + 1)]
+    for i in range(1, lenstr1 + 1):
+        row = [bound] * (lenstr2 + 1)
+        if i <= max_distance:
+            row[0] = i
+        low = max(1, i - max_distance)
+        high = min(lenstr2, i + max_distance)
+        char = s1[i - 1]
+        for j in range(low, high + 1):
+            cost = 0 if char == s2[j - 1] else 1
+            value = min(
+                prev_row[j] + 1,          # deletion
+                row[j - 1] + 1,           # insertion
+                prev_row[j - 1] + cost    # substitution
+            )
+            # Check for transposition
+            if (i > 1 and j > 1 and
+                    char == s2[j - 2] and
+                    s1[i - 2] == s2[j - 1] and
+                    char != s1[i - 2]):  # Ensure characters are different
+                value = min(value, prev_prev_row[j - 2] + 1)
+            row[j] = value if value < bound else bound
+        if min(row) > max_distance:
+            return bound
+        prev_prev_row, prev_row = prev_row, row
+    return prev_row[lenstr2]
+
+
+def damerau_levenstein_unrestricted(s1: str, s2: str) -> int:
+    """
+    Return the unrestricted Damerau-Levenstein distance between two strings.
+    Unlike damerau_levenstein (optimal string alignment), a substring may be
+    edited after being transposed, which makes this distance a true metric.
+    It is never greater than damerau_levenstein(s1, s2).
+    """
+    lenstr1 = len(s1)
+    lenstr2 = len(s2)
+    max_dist = lenstr1 + lenstr2
+    last_row = {}
+    d = [[0] * (lenstr2 + 2) for _ in range(lenstr1 + 2)]
+    d[0][0] = max_dist
+    for i in range(lenstr1 + 1):
+        d[i + 1][0] = max_dist
+        d[i + 1][1] = i
+    for j in range(lenstr2 + 1):
+        d[0][j + 1] = max_dist
+        d[1][j + 1] = j
+    for i in range(1, lenstr1 + 1):
+        last_match_col = 0
+        for j in range(1, lenstr2 + 1):
+            k = last_row.get(s2[j - 1], 0)
+            col = last_match_col
+            if s1[i - 1] == s2[j - 1]:
                 cost = 0
+                last_match_col = j
             else:
                 cost = 1
-            d[(i, j)] = min(
-                d[(i - 1, j)] + 1,      # deletion
-                d[(i, j - 1)] + 1,      # insertion
-                d[(i - 1, j - 1)] + cost  # substitution
+            d[i + 1][j + 1] = min(
+                d[i][j] + cost,      # substitution
+                d[i + 1][j] + 1,     # insertion
+                d[i][j + 1] + 1,     # deletion
+                d[k][col] + (i - k - 1) + 1 + (j - col - 1)  # transposition
             )
-            # Check for transposition
-            if (i > 0 and j > 0 and
-                    s1[i] == s2[j - 1] and
-                    s1[i - 1] == s2[j] and
-                    s1[i] != s1[i - 1]):  # Ensure characters are different
-                d[(i, j)] = min(d[(i, j)], d[(i - 2, j - 2)] + 1)
-    return d[lenstr1 - 1, lenstr2 - 1]
+        last_row[s1[i - 1]] = i
+    return d[lenstr1 + 1][lenstr2 + 1]
+
+
+def weighted_damerau_levenstein(
+        s1: str,
+        s2: str,
+        max_distance: float,
+        substitution_costs: Sequence[Mapping[str, float]],
+        transposition_cost: float = 1.0) -> float:
+    """
+    Return the Damerau-Levenstein distance between two strings when the
+    substitution of the i-th character of s1 by a character c costs
+    substitution_costs[i].get(c, 1) and a transposition costs
+    transposition_cost, or a value greater than max_distance as soon as
+    the distance is known to exceed it.
+
+    Insertions and deletions still cost 1, so as in damerau_levenstein
+    only the diagonal band of width max_distance is computed.
+    """
+    lenstr1 = len(s1)
+    lenstr2 = len(s2)
+    width = int(max_distance)
+    bound = max_distance + 1
+    if abs(lenstr1 - lenstr2) > width:
+        return bound
+    prev_prev_row = None
+    prev_row = [min(j, bound) for j in range(lenstr2 + 1)]
+    for i in range(1, lenstr1 + 1):
+        row = [bound] * (lenstr2 + 1)
+        if i <= width:
+            row[0] = i
+        low = max(1, i - width)
+        high = min(lenstr2, i + width)
+        char = s1[i - 1]
+        costs = substitution_costs[i - 1]
+        for j in range(low, high + 1):
+            other = s2[j - 1]
+            cost = 0 if char == other else costs.get(other, 1)
+            value = min(
+                prev_row[j] + 1,          # deletion
+                row[j - 1] + 1,           # insertion
+                prev_row[j - 1] + cost    # substitution
+            )
+            if (i > 1 and j > 1 and
+                    char == s2[j - 2] and
+                    s1[i - 2] == other and
+                    char != other):
+                value = min(value, prev_prev_row[j - 2] + transposition_cost)
+            row[j] = value if value < bound else bound
+        # Every later row is reached from this one, or by a transposition
+        # from the previous one, which may cost less than any other edit.
+        if min(row) > max_distance and \
+                min(prev_row) + transposition_cost > max_distance:
+            return bound
+        prev_prev_row, prev_row = prev_row, row
+    return prev_row[lenstr2]
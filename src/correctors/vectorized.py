@@ -0,0 +1,128 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Number of distance matrix cells per row that a batch of queries is sized
+# for, which keeps the rolling rows of a batch at a few megabytes.
+_BATCH_CELLS = 1 << 16
+
+
+def encode(words: List[str]) -> np.ndarray:
+    """
+    Return the code points of equally long words as a 2D integer array
+    """
+    length = len(words[0]) if words else 0
+    codes = np.fromiter((ord(char) for word in words for char in word),
+                        dtype=np.int32, count=len(words) * length)
+    return codes.reshape(len(words), length)
+
+
+def batch_distances(queries: np.ndarray,
+                    words: np.ndarray,
+                    max_distance: int) -> np.ndarray:
+    """
+    Return the Damerau-Levenstein distances between every query and every
+    word as a (queries, words) array, capped at max_distance + 1.
+    All queries must be equally long, and so must all words.
+    """
+    bound = max_distance + 1
+    n_queries, query_length = queries.shape
+    n_words, word_length = words.shape
+    columns = np.arange(word_length + 1, dtype=np.int32)
+    # Axis 0 is the query, axis 1 the word and axis 2 the word prefix.
+    q = queries[:, None, :]
+    w = words[None, :, :]
+    prev_prev_row = None
+    prev_row = np.broadcast_to(np.minimum(columns, bound),
+                               (n_queries, n_words, word_length + 1))
+    for i in range(1, query_length + 1):
+        char = q[:, :, i - 1:i]
+        row = np.empty_like(prev_row)
+        row[:, :, 0] = min(i, bound)
+        # Deletion and substitution only depend on the previous row.
+        row[:, :, 1:] = np.minimum(prev_row[:, :, 1:] + 1,
+                                   prev_row[:, :, :-1] + (char != w))
+        # Check for transposition
+        if i > 1 and word_length > 1:
+            prev_char = q[:, :, i - 2:i - 1]
+            swapped = ((char == w[:, :, :-1]) &
+                       (prev_char == w[:, :, 1:]) &
+                       (char != prev_char))
+            row[:, :, 2:] = np.where(swapped,
+                                     np.minimum(row[:, :, 2:],
+                                                prev_prev_row[:, :, :-2] + 1),
+                                     row[:, :, 2:])
+        # Insertion: row[j] = min over k <= j of row[k] + (j - k).
+        row = np.minimum.accumulate(row - columns, axis=2) + columns
+        np.minimum(row, bound, out=row)
+        if (row.min(axis=2) > max_distance).all():
+            return np.full((n_queries, n_words), bound, dtype=np.int32)
+        prev_prev_row, prev_row = prev_row, row
+    return np.array(prev_row[:, :, word_length], dtype=np.int32)
+
+
+class VectorizedIndex:
+    """
+    Brute-force vocabulary scan vectorized with NumPy.
+
+    The vocabulary is stored as one integer array per word length, and a
+    query is compared with a whole group at once, one row of the distance
+    matrix per query character. Only the groups whose length differs from
+    the query by at most the maximum distance are scanned.
+    """
+    def __init__(self, words: Iterable[str]) -> None:
+        """
+        :param words: The vocabulary to index
+        """
+        by_length: Dict[int, List[str]] = defaultdict(list)
+        for word in set(words):
+            by_length[len(word)].append(word)
+        self._words: Dict[int, List[str]] = {
+            length: sorted(group) for length, group in by_length.items()
+        }
+        self._codes: Dict[int, np.ndarray] = {
+            length: encode(group) for length, group in self._words.items()
+        }
+        self.size: int = sum(len(group) for group in self._words.values())
+
+    def supports(self, max_distance: int) -> bool:
+        """
+        A vocabulary scan can answer queries of any radius
+        """
+        return True
+
+    def search(self, word: str, max_distance: int) -> Dict[str, int]:
+        """
+        Return every indexed word within max_distance of word,
+        mapped to its Damerau-Levenstein distance
+        """
+        return self.search_many([word], max_distance)[0]
+
+    def search_many(self,
+                    words: List[str],
+                    max_distance: int) -> List[Dict[str, int]]:
+        """
+        Return the result of search for every word, in the same order.
+        Equally long queries are compared with the vocabulary together.
+        """
+        results: List[Dict[str, int]] = [{} for _ in words]
+        positions: Dict[int, List[int]] = defaultdict(list)
+        for position, word in enumerate(words):
+            positions[len(word)].append(position)
+        for query_length, group in positions.items():
+            queries = encode([words[position] for position in group])
+            for length, codes in self._codes.items():
+                if abs(length - query_length) > max_distance:
+                    continue
+                step = max(1, _BATCH_CELLS // (len(codes) * (length + 1)))
+                for start in range(0, len(group), step):
+                    distances = batch_distances(
+                        queries[start:start + step], codes, max_distance
+                    )
+                    for row, position in zip(distances,
+                                             group[start:start + step]):
+                        for k in np.flatnonzero(row <= max_distance):
+                            results[position][self._words[length][k]] = \
+                                int(row[k])
+        return results
@@ -0,0 +1,146 @@
+import heapq
+import math
+import zlib
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+def _typecode(largest: int) -> str:
+    """
+    Return the typecode of the smallest unsigned array that holds largest
+    """
+    return 'I' if largest < 2 ** 32 else 'Q'
+
+
+class Vocabulary(Mapping):
+    """
+    Read-only table of word frequencies kept in a few flat arrays.
+
+    The words are sorted and encoded back to back in one UTF-8 blob, with
+    their offsets and frequencies in arrays, so each word is known by its
+    position in the blob, its id, and takes a few bytes rather than a str,
+    an int and a dict slot. Words are found through an open addressing
+    table of ids keyed by the CRC-32 of their encoding, which is the same
+    in every process, so a pickled vocabulary stays valid.
+
+    Like a Counter, it returns 0 as the frequency of a missing word.
+    The log-probability of every word is computed once, so that ranking
+    words never computes a probability again.
+    """
+    def __init__(self, counts: Mapping) -> None:
+        """
+        :param counts: Frequencies of the words, e.g. a Counter
+        """
+        words = sorted(counts)
+        encoded = [word.encode('utf8') for word in words]
+        self._blob: bytes = b"".join(encoded)
+        self._offsets: array = array(_typecode(len(self._blob)),
+                                     accumulate(map(len, encoded),
+                                                initial=0))
+        frequencies = [counts[word] for word in words]
+        self._counts: array = array(_typecode(max(frequencies, default=0)),
+                                    frequencies)
+        self.total: int = sum(frequencies)
+        # Length in characters of the longest word.
+        self.max_length: int = max(map(len, words), default=0)
+        log_total = math.log(self.total) if self.total else 0.0
+        self._log_probs: array = array('d', (
+            math.log(count) - log_total if count else -math.inf
+            for count in frequencies
+        ))
+        # At most half of the slots are used, so probes stay short.
+        size = 1 << (2 * len(words)).bit_length()
+        self._mask: int = size - 1
+        self._slots: array = array(_typecode(len(words) + 1), [0]) * size
+        for word_id, data in enumerate(encoded):
+            slot = zlib.crc32(data) & self._mask
+            while self._slots[slot]:
+                slot = (slot + 1) & self._mask
+            self._slots[slot] = word_id + 1
+
+    def word_id(self, word: str) -> Optional[int]:
+        """
+        Return the id of a word, or None if it is not in the vocabulary
+        """
+        data = word.encode('utf8')
+        slots, offsets, blob = self._slots, self._offsets, self._blob
+        slot = zlib.crc32(data) & self._mask
+        while slots[slot]:
+            word_id = slots[slot] - 1
+            if blob[offsets[word_id]:offsets[word_id + 1]] == data:
+                return word_id
+            slot = (slot + 1) & self._mask
+        return None
+
+    def word(self, word_id: int) -> str:
+        """
+        Return the word with the given id
+        """
+        return self._blob[self._offsets[word_id]:
+                          self._offsets[word_id + 1]].decode('utf8')
+
+    def count(self, word_id: int) -> int:
+        """
+        Return the frequency of the word with the given id
+        """
+        return self._counts[word_id]
+
+    def log_prob(self, word_id: int) -> float:
+        """
+        Return the natural logarithm of the probability of the word with
+        the given id
+        """
+        return self._log_probs[word_id]
+
+    def rank(self, ids: Iterable[int], k: Optional[int] = None) -> List[int]:
+        """
+        Return the ids of the k most probable words (all if k is None),
+        from the most to the least probable. Words of equal probability
+        are in reverse alphabetical order.
+        """
+        # Both sorts keep the order of equal items, which descending ids
+        # make reverse alphabetical.
+        ids = sorted(ids, reverse=True)
+        if k is None or k >= len(ids):
+            return sorted(ids, key=self._log_probs.__getitem__, reverse=True)
+        return heapq.nlargest(k, ids, key=self._log_probs.__getitem__)
+
+    def get(self, word: str, default: Optional[int] = None) -> Optional[int]:
+        word_id = self.word_id(word)
+        return default if word_id is None else self._counts[word_id]
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Return the n most frequent words and their frequencies,
+        most frequent first, like Counter.most_common
+        """
+        ids = range(len(self._counts))
+        if n is None:
+            ids = sorted(ids, key=self._counts.__getitem__, reverse=True)
+        else:
+            ids = heapq.nlargest(n, ids, key=self._counts.__getitem__)
+        return [(self.word(word_id), self._counts[word_id])
+                for word_id in ids]
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        return zip(self, self._counts)
+
+    def values(self) -> Iterator[int]:
+        return iter(self._counts)
+
+    def __getitem__(self, word: str) -> int:
+        return self.get(word, 0)
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and self.word_id(word) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.word, range(len(self._counts)))
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __repr__(self) -> str:
+        return f"Vocabulary({len(self)} words)"
@@ -1,5 +1,6 @@
 from typing import Optional
 from .languages import alphabets as preloaded_alphabets
+from ..metrics import metrics
 import re
 
 
@@ -26,10 +27,11 @@ class SimpleLanguageDetector:
         :return: The detected language
         or None if the language is not recognized.
         """
-        word = word.lower()
-        # Remove punctuation, whitespace, and digits.
-        word = re.sub(r'[\'\’.\-,?!":;\s\d]', '', word)
-        for lang, alphabet in self.alphabets.items():
-            if all(char in alphabet for char in word):
-                return lang
-        return None
+        with metrics.timer("spelling_detect_seconds"):
+            word = word.lower()
+            # Remove punctuation, whitespace, and digits.
+            word = re.sub(r'[\'\’.\-,?!":;\s\d]', '', word)
+            for lang, alphabet in self.alphabets.items():
+                if all(char in alphabet for char in word):
+                    return lang
+            return None
@@ -2,3 +2,19 @@ alphabets = {
     'en': 'abcdefghijklmnopqrstuvwxyz',
     'bg': 'абвгдежзийклмнопрстуфхцчшщъьюя',
 }
+
+# Letter rows of the keyboard layout used to type each language, from the
+# top row down: QWERTY for English and the phonetic layout for Bulgarian.
+keyboards = {
+    'en': ['qwertyuiop', 'asdfghjkl', 'zxcvbnm'],
+    'bg': ['явертъуиопшщю', 'асдфгхйкл', 'зьцжбнм'],
+}
+
+# Pairs of letters that are often written for each other because they
+# sound alike.
+sound_alikes = {
+    'en': [('c', 'k'), ('c', 's'), ('s', 'z'), ('i', 'y'), ('a', 'e'),
+           ('e', 'i'), ('o', 'u'), ('g', 'j'), ('f', 'v')],
+    'bg': [('а', 'ъ'), ('о', 'у'), ('е', 'и'), ('б', 'п'), ('в', 'ф'),
+           ('г', 'к'), ('д', 'т'), ('ж', 'ш'), ('з', 'с'), ('я', 'а')],
+}
@@ -0,0 +1,217 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# Upper bounds in seconds of the latency histogram buckets.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+)
+
+# A metric is identified by its name and its sorted (label, value) pairs.
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, str]) -> MetricKey:
+    return name, tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{label}="{value}"' for label, value in labels)
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """
+    Latency histogram with cumulative bucket counts, like Prometheus'.
+    """
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * len(LATENCY_BUCKETS)
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.max: float = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Record one observation
+        """
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        """
+        Add the observations of another histogram
+        """
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters, gauges and latency histograms,
+    rendered in the Prometheus text format or as a short summary.
+
+    Every thread records durations in the histograms of one of several
+    independently locked stripes, so threads timing the same code rarely
+    wait for each other. The stripes are merged when the metrics are read.
+    """
+    def __init__(self, stripes: int = 16) -> None:
+        """
+        :param stripes: Number of independently locked sets of histograms
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be positive")
+        self._lock = threading.Lock()
+        self._counters: Dict[MetricKey, float] = {}
+        self._gauges: Dict[MetricKey, float] = {}
+        self._stripe_locks: List[threading.Lock] = [
+            threading.Lock() for _ in range(stripes)
+        ]
+        self._stripe_histograms: List[Dict[MetricKey, Histogram]] = [
+            {} for _ in range(stripes)
+        ]
+        # Threads are given the stripes in turn.
+        self._thread = threading.local()
+        self._threads = itertools.count()
+
+    def _stripe(self) -> int:
+        stripe = getattr(self._thread, "stripe", None)
+        if stripe is None:
+            stripe = next(self._threads) % len(self._stripe_locks)
+            self._thread.stripe = stripe
+        return stripe
+
+    def _histograms(self) -> Dict[MetricKey, Histogram]:
+        """
+        Return the histograms of all stripes merged
+        """
+        merged: Dict[MetricKey, Histogram] = {}
+        for lock, histograms in zip(self._stripe_locks,
+                                    self._stripe_histograms):
+            with lock:
+                for key, histogram in histograms.items():
+                    if key not in merged:
+                        merged[key] = Histogram()
+                    merged[key].merge(histogram)
+        return merged
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Add value to a counter
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        """
+        Set a gauge to value
+        """
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """
+        Record a duration in a latency histogram
+        """
+        key = _key(name, labels)
+        stripe = self._stripe()
+        with self._stripe_locks[stripe]:
+            histograms = self._stripe_histograms[stripe]
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """
+        Record the duration of the with block in a latency histogram
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        """
+        Forget every recorded value
+        """
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+        for lock, histograms in zip(self._stripe_locks,
+                                    self._stripe_histograms):
+            with lock:
+                histograms.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Return every metric in the Prometheus text exposition format
+        """
+        lines = []
+        histograms = self._histograms()
+        with self._lock:
+            for kind, values in (("counter", self._counters),
+                                 ("gauge", self._gauges)):
+                for name in sorted({name for name, _ in values}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (key_name, labels), value in sorted(values.items()):
+                        if key_name == name:
+                            lines.append(
+                                f"{name}{_format_labels(labels)} {value}"
+                            )
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (key_name, labels), histogram in sorted(histograms.items()):
+                if key_name != name:
+                    continue
+                for bound, count in zip(LATENCY_BUCKETS,
+                                        histogram.buckets):
+                    bucket_labels = labels + (("le", str(bound)),)
+                    lines.append(f"{name}_bucket"
+                                 f"{_format_labels(bucket_labels)}"
+                                 f" {count}")
+                bucket_labels = labels + (("le", "+Inf"),)
+                lines.append(f"{name}_bucket"
+                             f"{_format_labels(bucket_labels)}"
+                             f" {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)}"
+                             f" {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)}"
+                             f" {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """
+        Return a human readable table of the latency histograms
+        and the values of the counters and gauges
+        """
+        lines = [f"{'Metric':<40}{'Count':>10}{'Total s':>12}"
+                 f"{'Mean ms':>10}{'Max ms':>10}"]
+        for (name, labels), histogram in sorted(self._histograms().items()):
+            label = name + _format_labels(labels)
+            mean = histogram.sum / histogram.count * 1000
+            lines.append(f"{label:<40}{histogram.count:>10}"
+                         f"{histogram.sum:>12.4f}{mean:>10.3f}"
+                         f"{histogram.max * 1000:>10.3f}")
+        with self._lock:
+            for values in (self._counters, self._gauges):
+                for (name, labels), value in sorted(values.items()):
+                    label = name + _format_labels(labels)
+                    lines.append(f"{label:<40}{value:>10g}")
+        return "\n".join(lines)
+
+
+# Registry shared by the correctors, the language detector and the apps.
+metrics = MetricsRegistry()
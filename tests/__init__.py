@@ -0,0 +1,27 @@
+from src.correctors.utils import damerau_levenstein
+
+# Vocabulary and misspellings the search indexes are checked with.
+VOCABULARY = ["this", "is", "a", "sample", "dataset", "for", "testing",
+              "test", "tests", "data", "date", "simple", "sampler",
+              "abc", "ac"]
+
+QUERIES = ["datset", "tset", "Sample", "smaple", "zzzz", "tsetign",
+           "dta", "x", "ca", ""]
+
+
+def brute_force(word, max_distance):
+    """
+    Return the words of VOCABULARY within max_distance of word, mapped to
+    their distances, as every search index should find them
+    """
+    return {w: damerau_levenstein(word, w) for w in VOCABULARY
+            if damerau_levenstein(word, w) <= max_distance}
+
+
+def make_dataset(tmp_path, text, name="db.txt"):
+    """
+    Write text to a file of the pytest tmp_path and return its path
+    """
+    dataset = tmp_path / name
+    dataset.write_text(text, encoding="utf8")
+    return str(dataset)
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.app as api
+from src.correctors.feedback import FeedbackStore
+from src.metrics import metrics
+from tests import make_dataset
+
+
+@pytest.fixture
+def languages(tmp_path, monkeypatch):
+    """
+    Give the API an English dictionary of a few words, a feedback store
+    of its own and no language loaded yet
+    """
+    dataset = make_dataset(tmp_path, "hello world this is a test\n" * 3)
+    monkeypatch.setattr(api, "SUPPORTED_LANGUAGES", {"en": dataset})
+    monkeypatch.setattr(api, "correctors", {})
+    monkeypatch.setattr(api, "language_status", {})
+    monkeypatch.setattr(api, "_pending", {})
+    monkeypatch.setattr(api, "_partial", {})
+    monkeypatch.setattr(api, "PRELOAD", False)
+    monkeypatch.setattr(api, "SNAPSHOT_DIR", None)
+    monkeypatch.setattr(api, "FEEDBACK_DB", str(tmp_path / "feedback.db"))
+    monkeypatch.setattr(api, "FEEDBACK_POLL", 0.05)
+
+
+@pytest.fixture
+def client(languages):
+    with TestClient(api.app) as client:
+        yield client
+
+
+def wait_for(condition, timeout=5.0):
+    """
+    Wait until condition() is true, failing after timeout seconds
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_a_search(languages, monkeypatch):
+    searches = []
+    suggest = api.suggest
+
+    def slow_suggest(lang, word):
+        searches.append(word)
+        time.sleep(0.1)
+        return suggest(lang, word)
+
+    monkeypatch.setattr(api, "suggest", slow_suggest)
+    results = await asyncio.gather(
+        api.budgeted_suggestions("en", "helo"),
+        api.budgeted_suggestions("en", "Helo"),
+        api.budgeted_suggestions("en", "wrld"),
+    )
+    # Both spellings of helo waited for the same search.
+    assert len(searches) == 2 and "wrld" in searches
+    assert results[0] == results[1]
+    suggestions, partial = results[0]
+    assert suggestions[0] == "hello" and not partial
+    assert results[2][0][0] == "world"
+    assert api._pending == {}
+
+
+def test_time_budget(client, monkeypatch):
+    corrector = api.get_corrector_for_lang("en")
+    release = threading.Event()
+    search = corrector._index.search
+
+    class SlowIndex:
+        def search(self, word, max_distance):
+            if max_distance > 1:
+                release.wait()
+            return search(word, max_distance)
+
+    monkeypatch.setattr(corrector, "_index", SlowIndex())
+    monkeypatch.setattr(api, "TIME_BUDGET", 0.05)
+    try:
+        # The nearest words are found before the search widens.
+        assert client.get("/correct", params={"word": "helo"}).json() == \
+            {"word": "helo", "suggestions": ["hello"], "partial": True}
+        # A word without any is its own suggestion until then.
+        assert client.get("/correct", params={"word": "xyzzy"}).json() == \
+            {"word": "xyzzy", "suggestions": ["xyzzy"], "partial": True}
+    finally:
+        release.set()
+    # The search goes on and its result is cached for the next request.
+    wait_for(lambda: not api._pending)
+    assert api._partial == {}
+    response = client.get("/correct", params={"word": "helo"}).json()
+    assert response["suggestions"][0] == "hello"
+    assert len(response["suggestions"]) > 1
+    assert not response["partial"]
+
+
+def test_batch_suggestions_are_streamed(client, monkeypatch):
+    corrected = []
+
+    class Corrector:
+        def candidates(self, word, k=None):
+            corrected.append(word)
+            return [word.upper()]
+
+    monkeypatch.setattr(api, "get_corrector_for_lang",
+                        lambda lang: Corrector())
+    results = api.batch_suggestions(["helo", "wrld", "helo"])
+    # The first word is reported before the next one is corrected.
+    assert next(results) == {"word": "helo", "language": "en",
+                             "suggestions": ["HELO"]}
+    assert corrected == ["helo"]
+    assert [result["suggestions"] for result in results] == \
+        [["WRLD"], ["HELO"]]
+    assert corrected == ["helo", "wrld"]
+
+
+def test_correct_batch(client):
+    response = client.post("/correct/batch",
+                           json={"words": ["helo", " ", "wrld"]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["word"] for result in results] == ["helo", "wrld"]
+    assert results[0]["suggestions"][0] == "hello"
+    assert results[1]["suggestions"][0] == "world"
+
+    response = client.post("/correct/batch", json={"text": "Helo, тест"},
+                           headers={"Accept": "application/x-ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["word"], line["language"]) for line in lines] == \
+        [("Helo", "en"), ("тест", None)]
+    assert lines[0]["suggestions"][0] == "hello"
+    assert lines[1]["suggestions"] == []
+
+    assert client.post("/correct/batch", json={}).status_code == 400
+
+
+def test_load_language_warms_up_queries(client, tmp_path, monkeypatch):
+    warmup = tmp_path / "warmup.txt"
+    warmup.write_text("helo\n\nтест\nwrld\n", encoding="utf8")
+    monkeypatch.setattr(api, "WARMUP_FILE", str(warmup))
+    assert api.warmup_words("en") == ["helo", "wrld"]
+    api.load_language("en")
+    assert api.language_status["en"] == "ready"
+    corrector = api.correctors["en"]
+    assert corrector.cached_candidates("helo")[0] == "hello"
+    assert corrector.cached_candidates("wrld")[0] == "world"
+    assert corrector.cached_candidates("tset") is None
+
+
+def test_readiness(client, tmp_path, monkeypatch):
+    assert client.get("/ready").status_code == 503
+    assert client.get("/ready").json() == \
+        {"ready": False, "languages": {"en": "not loaded"}}
+    states = []
+
+    def warmup_words(lang):
+        states.append(api.language_status[lang])
+        return []
+
+    monkeypatch.setattr(api, "warmup_words", warmup_words)
+    api.load_language("en")
+    assert states == ["warming"]
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"ready": True, "languages": {"en": "ready"}}
+
+    monkeypatch.setitem(api.SUPPORTED_LANGUAGES, "bg",
+                        str(tmp_path / "missing.txt"))
+    with pytest.raises(FileNotFoundError):
+        api.load_language("bg")
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["languages"] == {"en": "ready", "bg": "failed"}
+
+
+def test_preload(languages, monkeypatch):
+    monkeypatch.setattr(api, "PRELOAD", True)
+    with TestClient(api.app) as client:
+        wait_for(lambda: client.get("/ready").status_code == 200)
+    assert api.language_status == {"en": "ready"}
+
+
+def test_update(client):
+    assert client.post("/update", json={"word": "helo",
+                                        "correction": "help"}).json() == \
+        {"message": "Cache updated."}
+    assert client.get("/correct", params={"word": "helo"}).json() == \
+        {"word": "helo", "suggestions": ["help"], "partial": False}
+    assert client.post("/update", json={"word": " ",
+                                        "correction": "a"}).status_code == 400
+    api.feedback_store.flush()
+    assert [entry[1:] for entry in api.feedback_store.read_since()] == \
+        [("en", "helo", "help")]
+    # A corrector loaded later, e.g. by another worker, replays the store.
+    api.correctors.clear()
+    assert api.get_corrector_for_lang("en").candidates("helo") == ["help"]
+
+
+def test_feedback_of_other_workers(client):
+    client.get("/correct", params={"word": "wrld"})
+    corrector = api.correctors["en"]
+    other_worker = FeedbackStore(api.FEEDBACK_DB)
+    other_worker.add("en", "wrld", "word")
+    other_worker.close()
+    wait_for(lambda: corrector.cached_candidates("wrld")[0] == "word")
+    assert client.get("/correct", params={"word": "wrld"}).json()[
+        "suggestions"] == ["word", "world"]
+
+
+def test_request_metrics_by_route(client):
+    metrics.reset()
+    client.get("/correct", params={"word": "helo"})
+    client.get("/no/such/path")
+    client.get("/another/unknown/path")
+    text = client.get("/metrics").text
+    assert 'spelling_requests_total{path="/correct",status="200"} 1' in text
+    assert 'spelling_requests_total{path="other",status="404"} 2' in text
+    assert 'spelling_request_seconds_count{path="other"} 2' in text
+    assert "unknown" not in text
@@ -0,0 +1,31 @@
+import random
+
+from benchmarks.run import compare, misspell, run_benchmarks
+
+
+def test_misspell_is_reproducible():
+    first = misspell("sample", 2, "abc", random.Random(1))
+    second = misspell("sample", 2, "abc", random.Random(1))
+    assert first == second
+    assert misspell("sample", 0, "abc", random.Random(1)) == "sample"
+
+
+def test_compare():
+    baseline = {"correct_d1": {"p50_ms": 1.0, "words_per_second": 100.0}}
+    results = {"correct_d1": {"p50_ms": 1.5, "words_per_second": 95.0},
+               "new": {"p50_ms": 1.0}}
+    assert compare(results, baseline, 0.2) == [
+        ("correct_d1", "p50_ms", 1.0, 1.5)
+    ]
+    assert compare(results, baseline, 0.6) == []
+
+
+def test_run_benchmarks(tmp_path):
+    dataset = tmp_path / "db.txt"
+    dataset.write_text("this is a sample dataset for testing testing",
+                       encoding="utf8")
+    results = run_benchmarks(str(dataset), "en", "symspell",
+                             max_distance=2, size=20, seed=0)
+    assert {"construction", "correct_d1", "candidates_d2", "process_text",
+            "process_file", "memory"} <= set(results)
+    assert results["correct_d2"]["words_per_second"] > 0
@@ -0,0 +1,19 @@
+from src.correctors.bk_tree import BKTree
+from tests import QUERIES, VOCABULARY, brute_force
+
+
+def test_tree_size_ignores_duplicates():
+    tree = BKTree(VOCABULARY + ["test", "data"])
+    assert tree.size == len(VOCABULARY)
+
+
+def test_empty_tree():
+    assert BKTree([]).search("test", 2) == {}
+
+
+def test_search_matches_brute_force():
+    tree = BKTree(VOCABULARY)
+    for word in QUERIES:
+        for distance in range(4):
+            assert tree.search(word, distance) == \
+                brute_force(word, distance)
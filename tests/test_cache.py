@@ -0,0 +1,120 @@
+import pickle
+
+import pytest
+
+from src.correctors.cache import LRUCache, StripedLRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache.get("a") == 1
+    cache["c"] = 3
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.evictions == 1
+
+
+def test_hit_and_miss_counts():
+    cache = LRUCache(max_entries=2)
+    cache["a"] = 1
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats() == {"size": 1, "pinned": 0, "hits": 1,
+                             "misses": 1, "evictions": 0}
+
+
+def test_pinned_entries_are_never_evicted():
+    cache = LRUCache(max_entries=1)
+    cache.pin("a", 1)
+    cache["b"] = 2
+    cache["c"] = 3
+    # Assignments leave pinned entries alone, only pin changes them.
+    cache["a"] = 4
+    assert cache.get("a") == 1
+    cache.pin("a", 5)
+    assert cache.get("a") == 5
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+def test_pinned_lookup():
+    for cache in (LRUCache(max_entries=2), StripedLRUCache(stripes=2)):
+        cache["a"] = 1
+        cache.pin("b", 2)
+        assert cache.pinned("a") is None
+        assert cache.pinned("b") == 2
+        assert cache.pinned("c", 0) == 0
+        assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+def test_unbounded_cache():
+    cache = LRUCache(max_entries=None)
+    for i in range(100):
+        cache[i] = i
+    assert len(cache) == 100 and cache.evictions == 0
+
+
+def test_negative_size():
+    with pytest.raises(ValueError):
+        LRUCache(max_entries=-1)
+
+
+def test_pin_update():
+    cache = LRUCache(max_entries=2)
+    cache["a"] = [1]
+    cache.pin_update("a", lambda value: value + [2])
+    cache.pin_update("b", lambda value: value)
+    assert cache.get("a") == [1, 2]
+    assert cache.stats()["pinned"] == 2
+
+
+def test_striped_cache():
+    cache = StripedLRUCache(max_entries=8, stripes=4)
+    for i in range(100):
+        cache[i] = i
+    cache.pin("key", "value")
+    assert cache.get("key") == "value"
+    assert cache.get(99) == 99
+    stats = cache.stats()
+    assert stats["size"] == len(cache) <= 9
+    assert stats["evictions"] == 100 - (stats["size"] - 1)
+    assert stats["hits"] == 2
+
+
+def test_striped_cache_needs_a_stripe():
+    with pytest.raises(ValueError):
+        StripedLRUCache(stripes=0)
+
+
+def test_pickle():
+    cache = StripedLRUCache(max_entries=8, stripes=2)
+    cache["a"] = 1
+    cache.pin("b", 2)
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.get("a") == 1 and copy.get("b") == 2
+    copy["c"] = 3
+    assert "c" not in cache
+
+
+def test_snapshot_and_restore():
+    cache = StripedLRUCache(max_entries=8, stripes=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache.pin("c", 3)
+    restored = StripedLRUCache(max_entries=8, stripes=3)
+    restored["a"] = 10
+    restored.restore(*cache.snapshot())
+    # Entries already cached are kept.
+    assert restored.get("a") == 10
+    assert restored.get("b") == 2
+    assert restored.stats()["pinned"] == 1
+
+
+def test_restore_respects_limit():
+    cache = LRUCache(max_entries=2)
+    cache["new"] = 0
+    cache.restore([("a", 1), ("b", 2), ("c", 3)], {})
+    assert "new" in cache and "c" in cache
+    assert len(cache) == 2
@@ -1,4 +1,8 @@
-from src.correctors.utils import damerau_levenstein
+from src.correctors.utils import (
+    damerau_levenstein,
+    damerau_levenstein_unrestricted,
+    weighted_damerau_levenstein,
+)
 
 
 def test_damerau_levenstein_same_string():
@@ -23,3 +27,63 @@ def test_damerau_levenstein_transposition():
 
 def test_damerau_levenstein_multiple_operations():
     assert damerau_levenstein("abc", "yabd") == 2
+
+
+def test_damerau_levenstein_unrestricted():
+    assert damerau_levenstein_unrestricted("test", "tset") == 1
+    assert damerau_levenstein_unrestricted("abc", "yabd") == 2
+    # Unlike the restricted distance, a transposed pair may be edited again.
+    assert damerau_levenstein("ca", "abc") == 3
+    assert damerau_levenstein_unrestricted("ca", "abc") == 2
+
+
+def test_damerau_levenstein_bounded():
+    pairs = [("test", "tset"), ("abc", "yabd"), ("ca", "abc"),
+             ("kitten", "sitting"), ("", "abc"), ("dataset", "datset")]
+    for s1, s2 in pairs:
+        distance = damerau_levenstein(s1, s2)
+        for max_distance in range(5):
+            bounded = damerau_levenstein(s1, s2, max_distance)
+            if distance <= max_distance:
+                assert bounded == distance
+            else:
+                assert bounded == max_distance + 1
+
+
+def test_damerau_levenstein_bounded_length_difference():
+    assert damerau_levenstein("a", "abcdef", 2) == 3
+
+
+def test_weighted_without_weights_matches_unweighted():
+    pairs = [("test", "tset"), ("abc", "yabd"), ("kitten", "sitting"),
+             ("", "abc"), ("datset", "dataset")]
+    for s1, s2 in pairs:
+        costs = [{}] * len(s1)
+        for bound in range(4):
+            expected = damerau_levenstein(s1, s2, bound)
+            actual = weighted_damerau_levenstein(s1, s2, bound, costs)
+            assert min(actual, bound + 1) == expected
+
+
+def test_weighted_substitution_costs():
+    costs = [{}, {"a": 0.5}, {}, {}]
+    assert weighted_damerau_levenstein("test", "tast", 3, costs) == 0.5
+    assert weighted_damerau_levenstein("test", "tost", 3, costs) == 1
+    assert weighted_damerau_levenstein("test", "tset", 3, costs, 0.75) == \
+        0.75
+
+
+def test_weighted_stops_past_bound():
+    costs = [{}] * 4
+    assert weighted_damerau_levenstein("test", "best", 0.5, costs) > 0.5
+    assert weighted_damerau_levenstein("test", "testing", 2, costs) > 2
+
+
+def test_weighted_cheap_transposition_within_bound():
+    # No single row is within the bound before the transposition ends.
+    assert weighted_damerau_levenstein("ab", "ba", 0.5, [{}, {}], 0.25) == \
+        0.25
+    assert weighted_damerau_levenstein("xaby", "xbay", 0.5, [{}] * 4,
+                                       0.25) == 0.25
+    assert weighted_damerau_levenstein("ab", "ba", 0.2, [{}, {}], 0.25) > \
+        0.2
@@ -0,0 +1,34 @@
+from src.correctors.error_model import (
+    ADJACENT_KEY_COST,
+    SOUND_ALIKE_COST,
+    ErrorModel,
+    adjacent_keys,
+)
+
+
+def test_adjacent_keys():
+    pairs = set(adjacent_keys(["qwe", "asd"]))
+    assert pairs == {("q", "w"), ("w", "e"), ("q", "a"), ("w", "a"),
+                     ("w", "s"), ("e", "s"), ("e", "d"), ("a", "s"),
+                     ("s", "d")}
+
+
+def test_english_model():
+    model = ErrorModel.for_language("en")
+    assert model.distance("hrllo", "hello", 3) == ADJACENT_KEY_COST
+    assert model.distance("kat", "cat", 3) == SOUND_ALIKE_COST
+    assert model.distance("hxllo", "hello", 3) == 1
+    # Case does not change the distance.
+    assert model.distance("Hrllo", "hello", 3) == ADJACENT_KEY_COST
+
+
+def test_bulgarian_model():
+    model = ErrorModel.for_language("bg")
+    # "в" is next to "е" on the phonetic layout.
+    assert model.distance("свло", "село", 3) == ADJACENT_KEY_COST
+    assert model.distance("зъп", "зъб", 3) == SOUND_ALIKE_COST
+
+
+def test_unknown_language_costs_one():
+    model = ErrorModel.for_language("xx")
+    assert model.distance("hrllo", "hello", 3) == 1
@@ -0,0 +1,31 @@
+from src.correctors.feedback import FeedbackStore
+
+
+def test_store_and_read(tmp_path):
+    store = FeedbackStore(str(tmp_path / "feedback.db"), batch_size=2)
+    assert store.last_id() == 0
+    store.add("en", "helo", "hello")
+    store.add("bg", "свят", "свят")
+    store.add("en", "wrld", "world")
+    store.flush()
+    assert [entry[1:] for entry in store.read_since()] == [
+        ("en", "helo", "hello"),
+        ("bg", "свят", "свят"),
+        ("en", "wrld", "world"),
+    ]
+    assert store.read_since(1, "en") == [(3, "en", "wrld", "world")]
+    assert store.last_id() == 3
+    store.close()
+
+
+def test_shared_between_stores(tmp_path):
+    path = str(tmp_path / "feedback.db")
+    first = FeedbackStore(path)
+    second = FeedbackStore(path)
+    first.add("en", "helo", "hello")
+    first.close()
+    assert second.read_since() == [(1, "en", "helo", "hello")]
+    second.close()
+    # Corrections survive a restart.
+    assert FeedbackStore(path).read_since(0, "en") == \
+        [(1, "en", "helo", "hello")]
@@ -1,3 +1,4 @@
+import io
 import sys
 import pytest
 
@@ -9,6 +10,11 @@ from src.app import (
     input_correlates_to_language,
     process_text,
     process_file,
+    process_lines_in_processes,
+    correct_stream,
+    correct_document,
+    correct_text,
+    stream_file,
     interactive_loop,
     main,
 )
@@ -52,6 +58,24 @@ def test_process_text_with_display(capsys):
     assert "Processing time:" in captured
 
 
+class ContextCorrector:
+    language_model = object()
+
+    def __init__(self):
+        self.contexts = []
+
+    def correct(self, word: str, previous=()) -> str:
+        self.contexts.append(list(previous))
+        return word
+
+
+def test_correct_text_in_context():
+    corrector = ContextCorrector()
+    assert correct_text("A b, c d. E", corrector) == "A b, c d. E"
+    # The context holds the two previous words of the same sentence.
+    assert corrector.contexts == [[], ["a"], ["a", "b"], ["b", "c"], []]
+
+
 def test_language_selector(monkeypatch):
     monkeypatch.setattr("builtins.input", lambda prompt="": "en")
     lang = language_selector()
@@ -89,7 +113,7 @@ def test_interactive_loop(monkeypatch):
     # Force PeterNorvigCorrector to always return our dummy.
     monkeypatch.setattr(app,
                         "PeterNorvigCorrector",
-                        lambda path, d: DummyCorrector())
+                        lambda path, d, **options: DummyCorrector())
     # Force the language validation to always pass.
     monkeypatch.setattr(app,
                         "input_correlates_to_language",
@@ -185,6 +209,115 @@ async def test_process_file_default_naming(tmp_path, monkeypatch):
     assert actual_output == expected_output
 
 
+class UpperCorrector:
+    def correct(self, word: str) -> str:
+        return word.upper()
+
+
+def test_process_lines_in_processes():
+    lines = [f"line {i}" for i in range(50)]
+    corrected = process_lines_in_processes(lines, UpperCorrector(), 3)
+    assert corrected == [f"LINE {i}" for i in range(50)]
+
+
+@pytest.mark.asyncio
+async def test_process_file_workers(tmp_path, monkeypatch):
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("Hello world\nsecond line\n\nlast",
+                          encoding="utf-8")
+    monkeypatch.setattr(app,
+                        "input_correlates_to_language",
+                        lambda lang, text: True)
+    await process_file(
+        str(input_file),
+        UpperCorrector(),
+        language="en",
+        output_dir=str(tmp_path),
+        output_name="result",
+        workers=2,
+    )
+    output_file = tmp_path / "result.txt"
+    assert output_file.read_text(encoding="utf-8") == \
+        "HELLO WORLD\nSECOND LINE\n\nLAST"
+
+
+class CountingCorrector:
+    def __init__(self):
+        self.calls = []
+
+    def correct(self, word: str) -> str:
+        self.calls.append(word)
+        return word.upper()
+
+
+def test_correct_document_corrects_every_word_once():
+    lines = ["the cat, the dog.", "The cat and the dog!", ""]
+    corrector = CountingCorrector()
+    corrected = correct_document(lines, corrector)
+    assert corrected == ["THE CAT, THE DOG.", "THE CAT AND THE DOG!", ""]
+    assert sorted(corrector.calls) == ["The", "and", "cat", "dog", "the"]
+
+
+def test_correct_document_matches_process_text():
+    lines = ["Hello, world - it's me.", "world\tworld"]
+    expected = [process_text(line, UpperCorrector(), display_corrected=False)
+                for line in lines]
+    assert correct_document(lines, UpperCorrector()) == expected
+    assert correct_document(lines, UpperCorrector(), workers=2) == expected
+
+
+@pytest.mark.asyncio
+async def test_process_file_dedupe(tmp_path, monkeypatch):
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("hello world\nworld hello", encoding="utf-8")
+    monkeypatch.setattr(app,
+                        "input_correlates_to_language",
+                        lambda lang, text: True)
+    corrector = CountingCorrector()
+    await process_file(str(input_file), corrector, language="en",
+                       output_dir=str(tmp_path), dedupe=True)
+    output_file = tmp_path / "input_corrected.txt"
+    assert output_file.read_text(encoding="utf-8") == \
+        "HELLO WORLD\nWORLD HELLO"
+    assert sorted(corrector.calls) == ["hello", "world"]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_correct_stream(workers):
+    text = "".join(f"line {i}, word.\n" for i in range(100)) + "\nlast"
+    output = io.StringIO()
+    assert correct_stream(io.StringIO(text), output, UpperCorrector(), "en",
+                          workers=workers, buffer_size=32)
+    assert output.getvalue() == text.upper()
+
+
+def test_correct_stream_invalid():
+    output = io.StringIO()
+    assert not correct_stream(io.StringIO("hello\nПривет\n"), output,
+                              UpperCorrector(), "en", buffer_size=1)
+
+
+def test_stream_file(tmp_path, capsys):
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("Hello world\nsecond line\n", encoding="utf-8")
+    stream_file(str(input_file), UpperCorrector(), "en",
+                output_dir=str(tmp_path))
+    output_file = tmp_path / "input_corrected.txt"
+    assert output_file.read_text(encoding="utf-8") == \
+        "HELLO WORLD\nSECOND LINE\n"
+    assert "Corrected file saved to" in capsys.readouterr().out
+
+
+def test_stream_file_invalid(tmp_path):
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("Hello Привет", encoding="utf-8")
+    with pytest.raises(SystemExit) as excinfo:
+        stream_file(str(input_file), UpperCorrector(), "en",
+                    output_dir=str(tmp_path))
+    assert excinfo.value.code == 1
+    assert list(tmp_path.iterdir()) == [input_file]
+
+
 @pytest.mark.asyncio
 async def test_process_file_invalid(tmp_path, monkeypatch):
     # Test the branch where language validation fails.
@@ -207,13 +340,14 @@ def test_main_interactive(monkeypatch):
     monkeypatch.setattr(sys, "argv", test_args)
     called_flag = {"called": False}
 
-    def dummy_interactive_loop(corrector, language, max_edit_distance):
+    def dummy_interactive_loop(corrector, language, max_edit_distance,
+                               **options):
         called_flag["called"] = True
 
     monkeypatch.setattr(app, "interactive_loop", dummy_interactive_loop)
     monkeypatch.setattr(app,
                         "PeterNorvigCorrector",
-                        lambda path, d: DummyCorrector())
+                        lambda path, d, **options: DummyCorrector())
     main()
     assert called_flag["called"]
 
@@ -232,11 +366,38 @@ def test_main_file_mode(monkeypatch, tmp_path):
     monkeypatch.setattr(app.asyncio, "run", dummy_asyncio_run)
     monkeypatch.setattr(app,
                         "PeterNorvigCorrector",
-                        lambda path, d: DummyCorrector())
+                        lambda path, d, **options: DummyCorrector())
     main()
     assert called_flag["called"]
 
 
+def test_main_compile_mode(monkeypatch, capsys):
+    test_args = ["app.py", "-d", "2", "-l", "en", "-c"]
+    monkeypatch.setattr(sys, "argv", test_args)
+
+    class CompilingCorrector(DummyCorrector):
+        def compile(self) -> str:
+            return "src/dataset/en.dict"
+
+    monkeypatch.setattr(app,
+                        "PeterNorvigCorrector",
+                        lambda path, d, **options: CompilingCorrector())
+    main()
+    captured = capsys.readouterr().out
+    assert "Compiled dictionary saved to src/dataset/en.dict" in captured
+
+
+def test_main_stdin_mode(monkeypatch, capsys):
+    test_args = ["app.py", "-d", "2", "-l", "en", "-f", "-"]
+    monkeypatch.setattr(sys, "argv", test_args)
+    monkeypatch.setattr(sys, "stdin", io.StringIO("hello\nworld"))
+    monkeypatch.setattr(app,
+                        "PeterNorvigCorrector",
+                        lambda path, d, **options: UpperCorrector())
+    main()
+    assert capsys.readouterr().out == "HELLO\nWORLD"
+
+
 def test_main_file_not_found(monkeypatch, capsys):
     # Simulate the branch where PeterNorvigCorrector raises FileNotFoundError.
     test_args = ["app.py", "-d", "2", "-l", "en"]
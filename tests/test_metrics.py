@@ -0,0 +1,59 @@
+import threading
+
+from src.metrics import MetricsRegistry
+
+
+def test_counters_and_gauges():
+    registry = MetricsRegistry()
+    registry.increment("requests_total", path="/correct")
+    registry.increment("requests_total", 2, path="/correct")
+    registry.set_gauge("dictionary_words", 10, language="en")
+    text = registry.render_prometheus()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{path="/correct"} 3' in text
+    assert 'dictionary_words{language="en"} 10' in text
+
+
+def test_histogram():
+    registry = MetricsRegistry()
+    registry.observe("stage_seconds", 0.002, stage="search")
+    registry.observe("stage_seconds", 2.0, stage="search")
+    text = registry.render_prometheus()
+    assert 'stage_seconds_bucket{stage="search",le="0.001"} 0' in text
+    assert 'stage_seconds_bucket{stage="search",le="0.005"} 1' in text
+    assert 'stage_seconds_bucket{stage="search",le="+Inf"} 2' in text
+    assert 'stage_seconds_count{stage="search"} 2' in text
+
+
+def test_timer_and_summary():
+    registry = MetricsRegistry()
+    with registry.timer("correct_seconds"):
+        pass
+    registry.increment("words_total", 5)
+    summary = registry.summary()
+    assert "correct_seconds" in summary
+    assert "words_total" in summary
+    registry.reset()
+    assert registry.render_prometheus() == "\n"
+
+
+def test_histograms_of_threads_are_merged():
+    registry = MetricsRegistry(stripes=2)
+
+    def work():
+        for _ in range(100):
+            registry.observe("stage_seconds", 0.002, stage="search")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.observe("stage_seconds", 2.0, stage="search")
+    text = registry.render_prometheus()
+    assert text.count("# TYPE stage_seconds histogram") == 1
+    assert 'stage_seconds_bucket{stage="search",le="0.005"} 400' in text
+    assert 'stage_seconds_count{stage="search"} 401' in text
+    assert "2000.000" in registry.summary()
+    registry.reset()
+    assert registry.render_prometheus() == "\n"
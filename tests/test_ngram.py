@@ -0,0 +1,37 @@
+from collections import Counter
+
+from src.correctors.ngram import NGramModel, ngrams
+
+
+def test_ngrams():
+    assert list(ngrams(["a", "b", "c"])) == ["a b", "b c", "a b c"]
+    assert list(ngrams(["a"])) == []
+
+
+def test_counts_are_never_too_low():
+    model = NGramModel(memory_bytes=4096)
+    counts = Counter(f"word{i} word{i + 1}" for i in range(500))
+    counts.update(["the cat"] * 7)
+    model.add(counts)
+    assert model.count("the", "cat") >= 7
+    assert all(model.count(f"word{i}", f"word{i + 1}") >= 1
+               for i in range(500))
+
+
+def test_memory_is_fixed():
+    model = NGramModel(memory_bytes=64 * 1024, depth=4)
+    size = len(model._table) * model._table.itemsize
+    assert size <= 64 * 1024
+    model.add(Counter(f"a{i} b{i}" for i in range(10000)))
+    assert len(model._table) * model._table.itemsize == size
+
+
+def test_score_backs_off():
+    model = NGramModel(memory_bytes=64 * 1024)
+    model.add(Counter(["the cat", "cat sat", "the cat sat"]))
+    unigrams = Counter({"the": 1, "cat": 1, "sat": 1, "hat": 1})
+    assert model.score("sat", ["the", "cat"], unigrams, 4) == 1.0
+    assert model.score("sat", ["a", "cat"], unigrams, 4) == 0.4
+    assert model.score("hat", ["a", "cat"], unigrams, 4) == \
+        0.4 * 0.4 * 1 / 4
+    assert model.score("hat", [], unigrams, 4) == 1 / 4
@@ -1,18 +1,36 @@
+import math
+import os
+import threading
+from collections import Counter
+
 import pytest
+from tests import make_dataset
+from src.correctors.compiled import compiled_path, read_compiled
+from src.correctors.error_model import ErrorModel
+from src.metrics import metrics
 from src.correctors.pn_corrector import (
+    CandidateIds,
     PeterNorvigCorrector,
+    RankedCandidates,
+    count_words,
+    get_words,
     preserve_case,
+    shard_offsets,
 )
 
 
+SAMPLE_TEXT = "this is a sample dataset for testing testing"
+CORPUS_TEXT = "".join(
+    f"Line {i}: this is a sample, a тест and a dataset.\n" for i in range(200)
+) + "no newline"
+CONTEXT_TEXT = "the cat sits\n" * 3 + "my red hat\n"
+SENTENCE_TEXT = "this is a sentence about the cat\n" * 3
+TYPING_TEXT = "hello jello cello yellow help hell\n" * 2 + "cello\n"
+
+
 @pytest.fixture
 def create_temp_dataset(tmp_path):
-    dataset_content = (
-        "this is a sample dataset for testing testing"
-    )
-    dataset_file = tmp_path / "db.txt"
-    dataset_file.write_text(dataset_content, encoding="utf8")
-    return str(dataset_file)
+    return make_dataset(tmp_path, SAMPLE_TEXT)
 
 
 def test_corrector_init(create_temp_dataset):
@@ -27,6 +45,13 @@ def test_corrector_prob(create_temp_dataset):
     assert 0 < p <= 1
 
 
+def test_corrector_log_prob(create_temp_dataset):
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2)
+    assert corrector.log_prob("testing") == \
+        pytest.approx(math.log(corrector.prob("testing")))
+    assert corrector.log_prob("missing") == -math.inf
+
+
 def test_corrector_correct_known_word(create_temp_dataset):
     corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2)
     # "this" is in the dataset.
@@ -62,10 +87,72 @@ def test_update_cache(create_temp_dataset):
     assert corrector._correction_cache["hello"] == "hello_corr"
     assert corrector._candidates_cache["hello"] == ["hello_corr"]
 
-    # Prepopulate candidates and update cache again.
-    corrector._candidates_cache["hello"] = ["other", "hello_corr"]
-    corrector.update_cache("hello", "hello_corr")
-    assert corrector._candidates_cache["hello"][0] == "hello_corr"
+    # Prepopulate the candidates of another word and promote one of them.
+    corrector._candidates_cache["wrold"] = ["other", "world"]
+    corrector.update_cache("wrold", "world")
+    assert corrector._candidates_cache["wrold"] == ["world", "other"]
+
+
+def test_update_cache_during_search(create_temp_dataset):
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2)
+    search = corrector._index.search
+
+    def search_then_confirm(word, max_distance):
+        result = search(word, max_distance)
+        # The user confirms a correction while the search is running.
+        corrector.update_cache("tesing", "sample")
+        return result
+
+    corrector._index = type("Index", (), {
+        "search": staticmethod(search_then_confirm)
+    })()
+    corrector.correct("tesing")
+    assert corrector.correct("tesing") == "sample"
+    assert corrector.candidates("tesing")[0] == "sample"
+
+
+def test_caches_are_bounded(create_temp_dataset):
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2,
+                                     cache_size=2, cache_stripes=1)
+    corrector.update_cache("helo", "hello")
+    for word in ["datset", "tset", "smaple", "zzzz"]:
+        corrector.correct(word)
+    stats = corrector.cache_stats()
+    assert stats["candidates"]["size"] == 3
+    assert stats["candidates"]["evictions"] == 2
+    # The confirmed correction is pinned.
+    assert corrector.correct("helo") == "hello"
+
+
+def test_concurrent_use(create_temp_dataset):
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2,
+                                     cache_size=4, cache_stripes=2)
+    words = ["datset", "tset", "smaple", "zzzz", "tesst", "thsi", "simple"]
+    errors = []
+    start = threading.Barrier(8)
+
+    def worker(seed):
+        try:
+            start.wait()
+            for i in range(300):
+                word = words[(seed + i) % len(words)]
+                corrector.correct(word)
+                assert corrector.candidates(word)
+                if i % 10 == seed:
+                    corrector.update_cache("helo", "hello")
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker, args=(seed,))
+               for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert corrector.candidates("helo") == ["hello"]
+    assert corrector.correct("helo") == "hello"
+    assert corrector.correct("datset") == "dataset"
 
 
 def test_preserve_case():
@@ -84,3 +171,241 @@ def test_corrector_cached_result(create_temp_dataset):
     # Since "Hello" is title case, the result should be capitalized.
     result = corrector.correct("Hello")
     assert result == "Hello_corr"
+
+
+@pytest.mark.parametrize("backend", ["symspell", "bktree", "trie", "numpy"])
+def test_backends_agree(create_temp_dataset, backend):
+    reference = PeterNorvigCorrector(create_temp_dataset, max_distance=2)
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2,
+                                     backend=backend)
+    for word in ["datset", "tset", "Sample", "smaple", "zzzz"]:
+        assert corrector.candidates(word) == reference.candidates(word)
+
+
+def test_unknown_backend(create_temp_dataset):
+    with pytest.raises(ValueError):
+        PeterNorvigCorrector(create_temp_dataset, backend="unknown")
+
+
+def test_completions(create_temp_dataset):
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2)
+    # "testing" appears twice in the dataset, so it ranks first.
+    assert corrector.completions("Te") == ["testing"]
+    assert corrector.completions("s") == ["sample"]
+    assert corrector.completions("q") == []
+
+
+def test_compile(create_temp_dataset):
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2,
+                                     backend="bktree")
+    path = corrector.compile()
+    assert path == compiled_path(create_temp_dataset)
+    compiled = read_compiled(create_temp_dataset)
+    assert compiled["words"] == corrector.words_dict
+    assert set(compiled["indexes"]) == {"bktree"}
+
+    loaded = PeterNorvigCorrector(create_temp_dataset, max_distance=2,
+                                  backend="bktree")
+    assert loaded.words_dict == corrector.words_dict
+    assert loaded.candidates("datset") == corrector.candidates("datset")
+
+
+def test_compiled_invalidated_by_dataset_change(create_temp_dataset):
+    PeterNorvigCorrector(create_temp_dataset, max_distance=2).compile()
+    with open(create_temp_dataset, "a", encoding="utf8") as file:
+        file.write(" extra")
+    stat = os.stat(create_temp_dataset)
+    os.utime(create_temp_dataset, ns=(stat.st_atime_ns,
+                                      stat.st_mtime_ns + 1))
+    assert read_compiled(create_temp_dataset) is None
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2)
+    assert "extra" in corrector.words_dict
+
+
+def test_count_words(tmp_path):
+    path = make_dataset(tmp_path, CORPUS_TEXT)
+    expected = Counter(get_words(CORPUS_TEXT))
+    # A tiny buffer makes every chunk hold a single line.
+    assert count_words(path, buffer_size=1) == expected
+    assert count_words(path) == expected
+
+
+def test_shard_offsets(tmp_path):
+    path = make_dataset(tmp_path, CORPUS_TEXT)
+    data = CORPUS_TEXT.encode("utf8")
+    offsets = shard_offsets(path, 4)
+    assert offsets[0] == 0 and offsets[-1] == len(data)
+    assert len(offsets) == 5
+    assert all(data[offset - 1:offset] == b"\n" for offset in offsets[1:-1])
+
+
+def test_count_words_parallel(tmp_path):
+    path = make_dataset(tmp_path, CORPUS_TEXT)
+    assert count_words(path, processes=3, buffer_size=64) == \
+        Counter(get_words(CORPUS_TEXT))
+
+
+def test_metrics(create_temp_dataset):
+    metrics.reset()
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2)
+    corrector.correct("datset")
+    corrector.correct("datset")
+    corrector.export_metrics(language="test")
+    text = metrics.render_prometheus()
+    assert 'spelling_correct_seconds_count 2' in text
+    assert 'spelling_stage_seconds_count{stage="search"} 1' in text
+    assert 'spelling_dictionary_words{language="test"} 7' in text
+    assert ('spelling_cache_hit_ratio{cache="corrections",language="test"}'
+            ' 0.5') in text
+
+
+def test_cache_snapshot(create_temp_dataset, tmp_path):
+    path = str(tmp_path / "db.cache")
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2)
+    corrector.correct("datset")
+    corrector.update_cache("helo", "hello")
+    corrector.save_snapshot(path)
+
+    warm = PeterNorvigCorrector(create_temp_dataset, max_distance=2,
+                                snapshot_path=path)
+    # The snapshot is only read when the caches are first needed.
+    assert "datset" not in warm._correction_cache
+    assert warm.correct("datset") == "dataset"
+    assert warm.cache_stats()["corrections"]["hits"] == 1
+    assert warm.candidates("helo") == ["hello"]
+
+    other = PeterNorvigCorrector(create_temp_dataset, max_distance=1)
+    assert not other.load_snapshot(path)
+    assert not other.load_snapshot(str(tmp_path / "missing.cache"))
+
+
+def test_top_k_candidates(tmp_path):
+    dataset = make_dataset(tmp_path, "cat cat cat bat bat hat mat")
+    corrector = PeterNorvigCorrector(dataset, max_distance=2)
+    everything = corrector.candidates("zat")
+    corrector = PeterNorvigCorrector(dataset, max_distance=2)
+    assert corrector.candidates("zat", 2) == ["cat", "bat"]
+    # Only two candidates are cached, asking for more ranks them again.
+    assert corrector.candidates("zat", 3) == everything[:3]
+    assert corrector.candidates("zat") == everything
+    assert corrector.candidates("zat", 1) == ["cat"]
+
+
+def test_correct_in_context(tmp_path):
+    dataset = make_dataset(tmp_path, CONTEXT_TEXT)
+    corrector = PeterNorvigCorrector(dataset, max_distance=1,
+                                     context_memory=64 * 1024)
+    assert corrector.correct("xat") == "cat"
+    assert corrector.correct("xat", ["my", "red"]) == "hat"
+    assert corrector.correct("Xat", ["the"]) == "Cat"
+    # Confirmed corrections win over the context, even of dictionary words.
+    corrector.update_cache("sits", "sat")
+    assert corrector.correct("sits", ["the", "cat"]) == "sat"
+    assert corrector.correct("Sits", ["my"]) == "Sat"
+    # So are those restored from a snapshot.
+    path = str(tmp_path / "db.cache")
+    corrector.save_snapshot(path)
+    restored = PeterNorvigCorrector(dataset, max_distance=1,
+                                    context_memory=64 * 1024,
+                                    snapshot_path=path)
+    assert restored.correct("sits", ["the", "cat"]) == "sat"
+    # Without a language model the previous words are ignored.
+    corrector = PeterNorvigCorrector(dataset, max_distance=1)
+    assert corrector.correct("xat", ["my", "red"]) == "cat"
+
+
+def test_compiled_language_model(tmp_path):
+    dataset = make_dataset(tmp_path, CONTEXT_TEXT)
+    corrector = PeterNorvigCorrector(dataset, max_distance=1,
+                                     context_memory=64 * 1024)
+    corrector.compile()
+    assert read_compiled(dataset)["ngrams"] is not None
+    loaded = PeterNorvigCorrector(dataset, max_distance=1,
+                                  context_memory=64 * 1024)
+    assert loaded.language_model.count("red", "hat") == 1
+    resized = PeterNorvigCorrector(dataset, max_distance=1,
+                                   context_memory=32 * 1024)
+    assert resized.language_model.memory_bytes == 32 * 1024
+
+
+def test_segment(tmp_path):
+    dataset = make_dataset(tmp_path, SENTENCE_TEXT)
+    corrector = PeterNorvigCorrector(dataset, max_distance=2)
+    assert corrector.segment("Thisisasentence") == \
+        ["this", "is", "a", "sentence"]
+    # Pieces that are not dictionary words are corrected.
+    assert corrector.segment("aboutthecqt") == ["about", "the", "cat"]
+    assert corrector.segment("") == []
+
+
+def test_correct_conjoined_words(tmp_path):
+    dataset = make_dataset(tmp_path, SENTENCE_TEXT)
+    corrector = PeterNorvigCorrector(dataset, max_distance=2)
+    assert corrector.correct("Thisisasentence") == "This is a sentence"
+    assert corrector.correct("THECAT") == "THE CAT"
+    # Splits with pieces that are not dictionary words are not taken,
+    # even if those pieces could be corrected.
+    assert corrector.segment("thxsisacat") == ["this", "is", "a", "cat"]
+    assert corrector.correct("thxsisacat") == "thxsisacat"
+    # Words that cannot be split into dictionary words are kept.
+    assert corrector.correct("xyzqxyzq") == "xyzqxyzq"
+
+
+def test_candidates_cached_as_ids(create_temp_dataset):
+    corrector = PeterNorvigCorrector(create_temp_dataset, max_distance=2)
+    candidates = corrector.candidates("tesing")
+    cached = corrector._candidates_cache["tesing"]
+    assert isinstance(cached, CandidateIds)
+    assert [corrector.words_dict.word(i) for i in cached] == candidates
+    # Cache hits are words again, whatever k is.
+    assert corrector.candidates("tesing", 1) == candidates[:1]
+    assert isinstance(corrector.candidates("tesing", 1), RankedCandidates)
+    assert corrector.cached_candidates("tesing") == candidates
+
+
+def test_error_model_ranking(tmp_path):
+    dataset = make_dataset(tmp_path, TYPING_TEXT)
+    model = ErrorModel.for_language("en")
+    corrector = PeterNorvigCorrector(dataset, max_distance=2,
+                                     error_model=model)
+    # "r" is next to "e", so "hello" beats the more frequent "cello".
+    assert corrector.correct("hrllo") == "hello"
+    candidates = corrector.candidates("hrllo")
+    # "j" is next to "h" too, so "jello" also beats "cello".
+    assert candidates[:3] == ["hello", "jello", "cello"]
+    # The top k candidates are found without ranking all of them.
+    other = PeterNorvigCorrector(dataset, max_distance=2,
+                                 error_model=model)
+    assert other.candidates("hrllo", 2) == candidates[:2]
+
+
+def test_snapshot_of_another_error_model(tmp_path):
+    dataset = make_dataset(tmp_path, TYPING_TEXT)
+    corrector = PeterNorvigCorrector(dataset, max_distance=2,
+                                     error_model=ErrorModel.for_language("en"))
+    corrector.candidates("hrllo")
+    path = str(tmp_path / "cache.snapshot")
+    corrector.save_snapshot(path)
+    plain = PeterNorvigCorrector(dataset, max_distance=2)
+    assert not plain.load_snapshot(path)
+    typing = PeterNorvigCorrector(dataset, max_distance=2,
+                                  error_model=ErrorModel.for_language("en"))
+    assert typing.load_snapshot(path)
+
+
+def test_candidates_progress(tmp_path):
+    dataset = make_dataset(tmp_path, TYPING_TEXT)
+    model = ErrorModel.for_language("en")
+    expected = PeterNorvigCorrector(dataset, max_distance=2,
+                                    error_model=model).candidates("hrllo")
+    stages = []
+    corrector = PeterNorvigCorrector(dataset, max_distance=2,
+                                     error_model=model)
+    assert corrector.candidates("hrllo", progress=stages.append) == expected
+    # The words one edit away are reported before the search widens.
+    assert stages == [["hello"]]
+    # Without an error model they are the result, so the search stops.
+    corrector = PeterNorvigCorrector(dataset, max_distance=2)
+    assert corrector.candidates("hrllo", progress=stages.append) == \
+        ["hello"]
+    assert stages == [["hello"]]
@@ -0,0 +1,34 @@
+import pytest
+
+from src.correctors.symspell import SymmetricDeleteIndex, get_deletes
+from tests import QUERIES, VOCABULARY, brute_force
+
+
+def test_get_deletes():
+    assert get_deletes("abc", 1) == {"abc", "bc", "ac", "ab"}
+    assert get_deletes("ab", 3) == {"ab", "a", "b", ""}
+
+
+def test_search_matches_brute_force():
+    index = SymmetricDeleteIndex(VOCABULARY, max_distance=3)
+    for word in QUERIES:
+        for distance in range(4):
+            assert index.search(word, distance) == \
+                brute_force(word, distance)
+
+
+def test_search_rejects_larger_distance():
+    index = SymmetricDeleteIndex(VOCABULARY, max_distance=1)
+    with pytest.raises(ValueError):
+        index.search("test", 2)
+
+
+def test_prefix_index_matches_brute_force():
+    index = SymmetricDeleteIndex(VOCABULARY, max_distance=2, prefix_length=3)
+    for word in ["datset", "tsetign", "sampel", "simpler", "dta"]:
+        for distance in range(3):
+            assert index.search(word, distance) == \
+                brute_force(word, distance)
+    # The prefix is always longer than the largest distance.
+    assert SymmetricDeleteIndex(VOCABULARY, max_distance=3,
+                                prefix_length=2).prefix_length == 4
@@ -0,0 +1,24 @@
+from src.correctors.trie import Trie
+from tests import QUERIES, VOCABULARY, brute_force
+
+
+def test_contains():
+    trie = Trie(VOCABULARY)
+    assert "test" in trie
+    assert "tes" not in trie
+    assert trie.size == len(VOCABULARY)
+
+
+def test_search_matches_brute_force():
+    trie = Trie(VOCABULARY)
+    for word in QUERIES:
+        for distance in range(4):
+            assert trie.search(word, distance) == \
+                brute_force(word, distance)
+
+
+def test_complete():
+    trie = Trie(VOCABULARY)
+    assert sorted(trie.complete("test")) == ["test", "testing", "tests"]
+    assert sorted(trie.complete("dat")) == ["data", "dataset", "date"]
+    assert trie.complete("xyz") == []
@@ -0,0 +1,26 @@
+from src.correctors.vectorized import VectorizedIndex
+from tests import QUERIES, VOCABULARY, brute_force
+
+
+def test_index_size_ignores_duplicates():
+    index = VectorizedIndex(VOCABULARY + ["test", "data"])
+    assert index.size == len(VOCABULARY)
+
+
+def test_empty_index():
+    assert VectorizedIndex([]).search("test", 2) == {}
+
+
+def test_search_matches_brute_force():
+    index = VectorizedIndex(VOCABULARY)
+    for word in QUERIES:
+        for distance in range(4):
+            assert index.search(word, distance) == \
+                brute_force(word, distance)
+
+
+def test_search_many_matches_search():
+    index = VectorizedIndex(VOCABULARY)
+    for distance in range(4):
+        assert index.search_many(QUERIES, distance) == \
+            [index.search(word, distance) for word in QUERIES]
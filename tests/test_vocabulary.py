@@ -0,0 +1,72 @@
+import math
+import pickle
+from collections import Counter
+
+import pytest
+
+from src.correctors.vocabulary import Vocabulary
+
+COUNTS = Counter({"the": 5, "cat": 3, "sat": 3, "мач": 2, "a": 1})
+
+
+def test_lookup():
+    vocabulary = Vocabulary(COUNTS)
+    assert len(vocabulary) == 5
+    assert vocabulary.total == 14
+    for word, count in COUNTS.items():
+        assert word in vocabulary
+        assert vocabulary[word] == count
+        assert vocabulary.word(vocabulary.word_id(word)) == word
+    assert "dog" not in vocabulary
+    assert vocabulary["dog"] == 0
+    assert vocabulary.get("dog") is None
+    assert vocabulary.word_id("dog") is None
+    # In characters, not in bytes of the encoding.
+    assert vocabulary.max_length == 3
+
+
+def test_ids_follow_word_order():
+    vocabulary = Vocabulary(COUNTS)
+    assert list(vocabulary) == sorted(COUNTS)
+    assert [vocabulary.word_id(w) for w in sorted(COUNTS)] == \
+        list(range(5))
+
+
+def test_behaves_like_counter():
+    vocabulary = Vocabulary(COUNTS)
+    assert vocabulary == COUNTS
+    assert dict(vocabulary.items()) == dict(COUNTS)
+    # Words of equal frequency come in alphabetical order.
+    assert vocabulary.most_common(2) == [("the", 5), ("cat", 3)]
+    assert [w for w, _ in vocabulary.most_common()][:3] == \
+        ["the", "cat", "sat"]
+
+
+def test_pickle():
+    vocabulary = Vocabulary(COUNTS)
+    loaded = pickle.loads(pickle.dumps(vocabulary))
+    assert loaded == vocabulary
+    assert loaded.max_length == vocabulary.max_length
+
+
+def test_empty():
+    vocabulary = Vocabulary(Counter())
+    assert len(vocabulary) == 0
+    assert "the" not in vocabulary
+    assert vocabulary.most_common(3) == []
+    assert vocabulary.max_length == 0
+
+
+def test_log_prob():
+    vocabulary = Vocabulary(COUNTS)
+    assert vocabulary.log_prob(vocabulary.word_id("the")) == \
+        pytest.approx(math.log(5 / 14))
+
+
+def test_rank_breaks_ties_in_reverse_alphabetical_order():
+    vocabulary = Vocabulary(COUNTS)
+    ids = [vocabulary.word_id(w) for w in ["cat", "a", "sat", "the"]]
+    ranked = [vocabulary.word(i) for i in vocabulary.rank(ids)]
+    assert ranked == ["the", "sat", "cat", "a"]
+    assert [vocabulary.word(i) for i in vocabulary.rank(ids, 2)] == \
+        ranked[:2]